@@ -1,21 +1,43 @@
 # server/db.py
 
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Default: local SQLite file. You can set DATABASE_URL in env to use Postgres later.
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./myshortbiz.db")
 
-# Special connect args only needed for SQLite
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Tracking events, rollups and sketches live in their own database so their
+# write volume never contends with logins, payments or page edits.
+ANALYTICS_DATABASE_URL = os.getenv("ANALYTICS_DATABASE_URL", "sqlite:///./myshortbiz_analytics.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,          # set True if you want to see SQL in logs
-    future=True,
-    connect_args=connect_args,
-)
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # Lets the tracking compaction job return freed pages to the OS
+    # with PRAGMA incremental_vacuum. Only takes effect on new files.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    cursor.close()
+
+
+def _create_engine(url: str):
+    # Special connect args only needed for SQLite
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+    new_engine = create_engine(
+        url,
+        echo=False,          # set True if you want to see SQL in logs
+        future=True,
+        connect_args=connect_args,
+    )
+    if url.startswith("sqlite"):
+        event.listen(new_engine, "connect", _sqlite_pragmas)
+    return new_engine
+
+
+engine = _create_engine(DATABASE_URL)
+analytics_engine = _create_engine(ANALYTICS_DATABASE_URL)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -24,7 +46,17 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+AnalyticsSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=analytics_engine,
+    future=True,
+)
+
 Base = declarative_base()
+# Models stored in the analytics database. They may not have foreign keys
+# or relationships to Base models.
+AnalyticsBase = declarative_base()
 
 
 def get_db():
@@ -33,3 +65,37 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_analytics_db():
+    db = AnalyticsSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def sync_schema(bind=engine, metadata=None):
+    """
+    create_all() skips tables that already exist. We have no migration tool,
+    so also add any columns and indexes that were introduced on existing
+    tables since the database file was created. New columns must be
+    nullable or carry a server_default.
+    """
+    metadata = metadata or Base.metadata
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
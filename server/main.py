@@ -1,17 +1,66 @@
+from contextlib import asynccontextmanager
+
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 
-from db import Base, engine
+from db import AnalyticsBase, Base, SessionLocal, analytics_engine, engine, sync_schema
 
 # Import routers
-from routers import auth, blog, pricing, payments, content, contact, dashboard, ai_cv, ai_bio, ai_social, ai_link, ai_video, video_prompt_builder
+from routers import auth, blog, pricing, payments, content, contact, dashboard, analytics, ai_cv, ai_bio, ai_social, ai_link, ai_video, video_prompt_builder
+
+from routers.content import backfill_page_snapshots
+from services.block_ranks import rank_rebalance_task, rebalance_block_ranks
+from services.heavy_hitters import heavy_hitters
+from services.page_renderer import STATIC_PAGES_DIR
+from services.short_code_allocator import short_code_allocator
+from services.short_link_clicks import click_aggregator
+from services.tracking_compaction import compaction_task
+from services.tracking_counters import backfill_counters
+from services.tracking_ingest import tracking_queue
+from utils.redirect_fast_path import ShortLinkRedirectMiddleware
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+sync_schema(engine)
+AnalyticsBase.metadata.create_all(bind=analytics_engine)
+sync_schema(analytics_engine, AnalyticsBase.metadata)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with SessionLocal() as db:
+        short_code_allocator.warm(db)
+
+    # Give blocks from before fractional ranks a rank before serving
+    rebalance_block_ranks()
+    # Public page reads only serve stored snapshots
+    backfill_page_snapshots()
+    # Fill tracking counters the first time they exist
+    backfill_counters()
+
+    # Background writers start with the app and are flushed on shutdown
+    click_aggregator.start()
+    tracking_queue.start()
+    heavy_hitters.start()
+    compaction_task.start()
+    rank_rebalance_task.start()
+    try:
+        yield
+    finally:
+        rank_rebalance_task.stop()
+        compaction_task.stop()
+        tracking_queue.stop()
+        heavy_hitters.stop()
+        click_aggregator.stop()
+
 
 # Create app
 app = FastAPI(
     title="MyShortBIZ API",
+    lifespan=lifespan,
     swagger_ui_parameters={"persistAuthorization": True}
 )
 
@@ -24,6 +73,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Short-link redirects are answered before routing (added last = outermost)
+app.add_middleware(ShortLinkRedirectMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(blog.router)
@@ -32,6 +84,7 @@ app.include_router(payments.router)
 app.include_router(content.router)
 app.include_router(contact.router)
 app.include_router(dashboard.router)
+app.include_router(analytics.router)
 app.include_router(ai_cv.router)
 app.include_router(ai_bio.router)
 app.include_router(ai_social.router)
@@ -39,6 +92,12 @@ app.include_router(ai_link.router)
 app.include_router(ai_video.router)
 app.include_router(video_prompt_builder.router)
 
+# Pre-rendered public profiles (see scripts/render_static_pages.py). In
+# production nginx should serve this directory directly.
+if STATIC_PAGES_DIR:
+    os.makedirs(STATIC_PAGES_DIR, exist_ok=True)
+    app.mount("/p", StaticFiles(directory=STATIC_PAGES_DIR, html=True), name="static_pages")
+
 
 @app.get("/")
 def root():
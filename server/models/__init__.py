@@ -9,3 +9,9 @@ from .block import Block
 from models.ai_usage import AIUsage
 from .short_link import ShortLink
 from .video_job import VideoJob  
+from .short_link_click import ShortLinkClickEvent, ShortLinkClickHourly, ShortLinkClickDaily
+from .tracking_dimension import UserAgent, Referrer
+from .tracking_rollup import PageViewDaily, LinkClickDaily, TrackingCounter, CampaignDaily
+from .unique_visitor import UniqueVisitorSketch
+from .heavy_hitter import HeavyHitterSketch
+from .analytics_meta import AnalyticsMeta
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+
+from db import AnalyticsBase
+
+
+class AnalyticsMeta(AnalyticsBase):
+    """One-off jobs done on the analytics database, e.g. backfills."""
+
+    __tablename__ = "analytics_meta"
+
+    key = Column(String(64), primary_key=True)
+    done_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from db import Base
@@ -14,8 +14,14 @@ class Block(Base):
     label = Column(String, nullable=False)
     url = Column(String, nullable=False)
     is_primary = Column(Boolean, default=False)
-    sort_order = Column(Integer, nullable=True)
+    sort_order = Column(Integer, nullable=True)  # legacy ordering, see rank
+    # Fractional index (services/block_ranks.py): moving or inserting a block
+    # only rewrites that block's rank.
+    rank = Column(String(64), nullable=True)
     is_active = Column(Boolean, default=True)
 
     page = relationship("Page", back_populates="blocks")
-    clicks = relationship("LinkClick", back_populates="block", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_blocks_page_rank", "page_id", "rank"),
+    )
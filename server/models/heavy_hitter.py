@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Date, Text
+
+from db import AnalyticsBase
+
+
+class HeavyHitterSketch(AnalyticsBase):
+    """
+    Space-Saving summary (JSON) of the most frequent referrers or clicked
+    blocks on one page for one UTC day.
+    """
+
+    __tablename__ = "heavy_hitter_sketches"
+
+    page_id = Column(Integer, primary_key=True)
+    dimension = Column(String(16), primary_key=True)  # "referrer" or "block"
+    day = Column(Date, primary_key=True)
+    data = Column(Text, nullable=False)
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
-from db import Base
+from db import AnalyticsBase, Base
 
 
 class Page(Base):
@@ -16,6 +16,13 @@ class Page(Base):
     avatar_url = Column(String, nullable=True)
     theme = Column(String, nullable=True)
 
+    # Serialized PublicPageResponse (page + active blocks), rebuilt in the
+    # same transaction as any change to the page or its blocks.
+    snapshot_json = Column(Text, nullable=True)
+    # Incremented with every snapshot rebuild; lets each worker tell whether
+    # its cached copy of the public page is still current.
+    version = Column(Integer, nullable=False, server_default="0")
+
     blocks = relationship(
         "Block",
         back_populates="page",
@@ -23,35 +30,68 @@ class Page(Base):
         order_by="Block.sort_order",
     )
 
-    views = relationship("PageView", back_populates="page", cascade="all, delete-orphan")
-    clicks = relationship("LinkClick", back_populates="page", cascade="all, delete-orphan")
 
+# Tracking events are stored in the analytics database, so page_id and
+# block_id are plain columns rather than foreign keys.
 
-class PageView(Base):
+class PageView(AnalyticsBase):
     __tablename__ = "page_views"
 
     id = Column(Integer, primary_key=True, index=True)
-    page_id = Column(Integer, ForeignKey("pages.id", ondelete="CASCADE"), index=True)
+    page_id = Column(Integer, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Number of events this row stands for; above 1 only while the page is
+    # sampled (services/tracking_sampling.py). Count with SUM, not COUNT.
+    sample_weight = Column(Integer, nullable=False, server_default="1")
 
     ip_address = Column(String, nullable=True)
+    user_agent_id = Column(Integer, ForeignKey("user_agents.id"), nullable=True, index=True)
+    referrer_id = Column(Integer, ForeignKey("referrers.id"), nullable=True, index=True)
+
+    # Raw strings from before user_agent/referrer were interned; new rows
+    # only set the *_id columns.
     user_agent = Column(String, nullable=True)
     referrer = Column(String, nullable=True)
 
-    page = relationship("Page", back_populates="views")
+    # UTM parameters, parsed once at ingestion (services/campaigns.py).
+    utm_source = Column(String(255), nullable=True)
+    utm_medium = Column(String(255), nullable=True)
+    utm_campaign = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        # Per-page time ranges (exports, time series); sample_weight makes
+        # it covering for the grouped time-series query.
+        Index("ix_page_views_page_created", "page_id", "created_at", "sample_weight"),
+        Index("ix_page_views_page_campaign", "page_id", "utm_campaign"),
+    )
 
 
-class LinkClick(Base):
+class LinkClick(AnalyticsBase):
     __tablename__ = "link_clicks"
 
     id = Column(Integer, primary_key=True, index=True)
-    page_id = Column(Integer, ForeignKey("pages.id", ondelete="CASCADE"), index=True)
-    block_id = Column(Integer, ForeignKey("blocks.id", ondelete="CASCADE"), index=True)
+    page_id = Column(Integer, index=True)
+    block_id = Column(Integer, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Number of events this row stands for; above 1 only while the page is
+    # sampled (services/tracking_sampling.py). Count with SUM, not COUNT.
+    sample_weight = Column(Integer, nullable=False, server_default="1")
 
     ip_address = Column(String, nullable=True)
+    user_agent_id = Column(Integer, ForeignKey("user_agents.id"), nullable=True, index=True)
+    referrer_id = Column(Integer, ForeignKey("referrers.id"), nullable=True, index=True)
+
+    # Raw strings from before user_agent/referrer were interned; new rows
+    # only set the *_id columns.
     user_agent = Column(String, nullable=True)
     referrer = Column(String, nullable=True)
 
-    page = relationship("Page", back_populates="clicks")
-    block = relationship("Block", back_populates="clicks")
+    # UTM parameters, parsed once at ingestion (services/campaigns.py).
+    utm_source = Column(String(255), nullable=True)
+    utm_medium = Column(String(255), nullable=True)
+    utm_campaign = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_link_clicks_page_created", "page_id", "created_at", "block_id", "sample_weight"),
+        Index("ix_link_clicks_page_campaign", "page_id", "utm_campaign"),
+    )
@@ -1,8 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 
 from db import Base
 
+# SQLite stores the server default (CURRENT_TIMESTAMP) as text without
+# microseconds; bind datetimes the same way so the pagination cursor
+# compares equal to the stored value.
+_SQLITE_TIMESTAMP = sqlite.DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
+
 
 class ShortLink(Base):
     __tablename__ = "short_links"
@@ -19,4 +27,14 @@ class ShortLink(Base):
 
     click_count = Column(Integer, nullable=False, default=0)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
\ No newline at end of file
+    created_at = Column(
+        DateTime(timezone=True).with_variant(_SQLITE_TIMESTAMP, "sqlite"),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        # Keyset pagination of a user's links, newest first or by clicks
+        Index("ix_short_links_user_created", "user_id", "created_at", "id"),
+        Index("ix_short_links_user_clicks", "user_id", "click_count", "id"),
+    )
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime
+from sqlalchemy.sql import func
+
+from db import AnalyticsBase
+
+
+class ShortLinkClickEvent(AnalyticsBase):
+    """Append-only raw click stream for short links."""
+
+    __tablename__ = "short_link_click_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    short_link_id = Column(Integer, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    referrer = Column(Text, nullable=True)
+    user_agent = Column(String, nullable=True)
+
+
+class ShortLinkClickHourly(AnalyticsBase):
+    __tablename__ = "short_link_clicks_hourly"
+
+    short_link_id = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)  # UTC, truncated to the hour
+    clicks = Column(Integer, nullable=False, default=0)
+
+
+class ShortLinkClickDaily(AnalyticsBase):
+    __tablename__ = "short_link_clicks_daily"
+
+    short_link_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC
+    clicks = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String
+
+from db import AnalyticsBase
+
+
+class UserAgent(AnalyticsBase):
+    """Interned user-agent strings referenced by page_views / link_clicks."""
+
+    __tablename__ = "user_agents"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(String(1024), unique=True, nullable=False)
+
+
+class Referrer(AnalyticsBase):
+    """Interned referrer URLs referenced by page_views / link_clicks."""
+
+    __tablename__ = "referrers"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(String(1024), unique=True, nullable=False)
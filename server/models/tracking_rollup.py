@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, String, Date
+
+from db import AnalyticsBase
+
+
+class PageViewDaily(AnalyticsBase):
+    """Compacted page views: one row per page per UTC day."""
+
+    __tablename__ = "page_views_daily"
+
+    page_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+
+
+class LinkClickDaily(AnalyticsBase):
+    """Compacted link clicks: one row per block per UTC day."""
+
+    __tablename__ = "link_clicks_daily"
+
+    page_id = Column(Integer, primary_key=True)
+    block_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    clicks = Column(Integer, nullable=False, default=0)
+
+
+class TrackingCounter(AnalyticsBase):
+    """
+    Running totals kept up to date by tracking ingestion. The block_id 0
+    row holds the page's views and all of its clicks; every other row
+    holds one block's clicks.
+    """
+
+    __tablename__ = "tracking_counters"
+
+    page_id = Column(Integer, primary_key=True)
+    block_id = Column(Integer, primary_key=True, default=0)
+    views = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
+
+
+class CampaignDaily(AnalyticsBase):
+    """
+    Views and clicks per UTM source/medium/campaign per page per UTC day.
+    Missing UTM values are stored as "".
+    """
+
+    __tablename__ = "campaign_daily"
+
+    page_id = Column(Integer, primary_key=True)
+    day = Column(Date, primary_key=True)
+    source = Column(String(255), primary_key=True, default="")
+    medium = Column(String(255), primary_key=True, default="")
+    campaign = Column(String(255), primary_key=True, default="")
+    views = Column(Integer, nullable=False, default=0)
+    clicks = Column(Integer, nullable=False, default=0)
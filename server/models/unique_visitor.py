@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Date, LargeBinary
+
+from db import AnalyticsBase
+
+
+class UniqueVisitorSketch(AnalyticsBase):
+    """
+    HyperLogLog registers of the visitors seen on one UTC day, for a page
+    (block_id 0) or for clicks on one of its blocks.
+    """
+
+    __tablename__ = "unique_visitor_sketches"
+
+    page_id = Column(Integer, primary_key=True)
+    block_id = Column(Integer, primary_key=True, default=0)
+    day = Column(Date, primary_key=True)
+    registers = Column(LargeBinary, nullable=False)
@@ -1,16 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import RedirectResponse
+import base64
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
-from db import get_db
+from db import SessionLocal, get_analytics_db, get_db
 from models import User
 from models.short_link import ShortLink
+from models.short_link_click import ShortLinkClickHourly, ShortLinkClickDaily
 from routers.auth import get_current_user
 from schemas.ai_link import LinkGenerateRequest, LinkGenerateResponse, ShortLinkOut
-from services.ai_link_service import generate_short_link_record
+from services.ai_link_service import (
+    LINK_BATCH_MAX_ITEMS,
+    estimate_link_batch_tokens,
+    generate_short_link_batch,
+    generate_short_link_record,
+    reserve_tokens,
+)
+from services.short_code_allocator import ShortCodeAllocationError
+from services.short_link_cache import resolve_short_code, short_link_cache
+from services.short_link_clicks import click_aggregator
 from schemas.link_analytics import (
     ShortLinkAnalyticsItem,
     ShortLinkAnalyticsSummary,
+    ShortLinkClickBucket,
+    ShortLinkClickSeries,
 )
 
 router = APIRouter(tags=["AI Link"])
@@ -30,7 +53,10 @@ def generate_link_endpoint(
     if user.tokens_remaining <= 0:
         raise HTTPException(status_code=402, detail="Not enough tokens")
 
-    short_link, tokens_used = generate_short_link_record(req, db, user)
+    try:
+        short_link, tokens_used = generate_short_link_record(req, db, user)
+    except ShortCodeAllocationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
     base_url = str(request.base_url).rstrip("/")
     short_url = f"{base_url}/r/{short_link.short_code}"
@@ -48,49 +74,237 @@ def generate_link_endpoint(
     )
 
 
+def _parse_batch_items(body: bytes, content_type: str) -> list:
+    """
+    Parse a JSON array (or {"items": [...]}) or a CSV file with a header row
+    into LinkGenerateRequest objects. Invalid rows become ValidationErrors so
+    they can be reported per item.
+    """
+    text = body.decode("utf-8-sig")
+
+    if "csv" in content_type:
+        rows = [
+            {k.strip(): v for k, v in row.items() if k and v not in (None, "")}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+    else:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV.")
+        rows = data.get("items") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV.")
+
+    items = []
+    for row in rows:
+        try:
+            items.append(LinkGenerateRequest.model_validate(row))
+        except ValidationError as exc:
+            items.append(exc)
+    return items
+
+
+@router.post("/ai/link/generate/bulk")
+async def generate_links_bulk_endpoint(
+    request: Request,
+    current_user=Depends(get_current_user),
+):
+    """
+    Create many short links at once from a JSON array or CSV upload.
+    Streams one NDJSON line per item, then a summary line.
+    """
+    body = await request.body()
+    # Everything past reading the body blocks (parsing, database, OpenAI):
+    # setup runs in a worker thread, and the sync stream is iterated in one.
+    return await run_in_threadpool(
+        _generate_links_bulk,
+        body,
+        request.headers.get("content-type", ""),
+        current_user.id,
+        str(request.base_url).rstrip("/"),
+    )
+
+
+def _generate_links_bulk(body: bytes, content_type: str, user_id: str, base_url: str) -> StreamingResponse:
+    items = _parse_batch_items(body, content_type)
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No links provided.")
+    if len(items) > LINK_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {LINK_BATCH_MAX_ITEMS} links per batch.",
+        )
+
+    db = SessionLocal()
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        db.close()
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if user.tokens_remaining <= 0:
+        db.close()
+        raise HTTPException(status_code=402, detail="Not enough tokens")
+
+    # Reserve the batch's estimated cost before any OpenAI call is made, so
+    # a small balance cannot pay for a large batch.
+    reserved = estimate_link_batch_tokens(sum(not isinstance(item, Exception) for item in items))
+    if not reserve_tokens(db, user.id, reserved):
+        db.close()
+        raise HTTPException(
+            status_code=402,
+            detail=f"Not enough tokens: this batch needs up to {reserved}.",
+        )
+
+    def stream():
+        # The session outlives the request handler, so it is owned here.
+        try:
+            for result in generate_short_link_batch(items, db, user, base_url, reserved):
+                yield json.dumps(result) + "\n"
+        except Exception as exc:
+            db.rollback()
+            yield json.dumps({"done": True, "ok": False, "error": str(exc)}) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+LinkSort = Literal["created", "clicks"]
+
+
+def _encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, key: str, parse) -> tuple:
+    """(parse(data[key]), id) from a cursor made by _encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return parse(data[key]), int(data["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _page_user_links(
+    db: Session,
+    user_id: str,
+    sort: LinkSort,
+    cursor: Optional[str],
+    limit: int,
+) -> tuple[list[ShortLink], Optional[str]]:
+    """
+    Keyset-paginate a user's links, newest first or most clicked first.
+    The cursor carries the last row's sort key and id.
+    """
+    query = db.query(ShortLink).filter(ShortLink.user_id == user_id)
+
+    if sort == "clicks":
+        order = (ShortLink.click_count.desc(), ShortLink.id.desc())
+        if cursor:
+            clicks, last_id = _decode_cursor(cursor, "clicks", int)
+            query = query.filter(
+                or_(
+                    ShortLink.click_count < clicks,
+                    and_(ShortLink.click_count == clicks, ShortLink.id < last_id),
+                )
+            )
+    else:
+        order = (ShortLink.created_at.desc(), ShortLink.id.desc())
+        if cursor:
+            last_created, last_id = _decode_cursor(cursor, "created_at", datetime.fromisoformat)
+            query = query.filter(
+                or_(
+                    ShortLink.created_at < last_created,
+                    and_(ShortLink.created_at == last_created, ShortLink.id < last_id),
+                )
+            )
+
+    links = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(links) > limit:
+        links = links[:limit]
+        last = links[-1]
+        if sort == "clicks":
+            next_cursor = _encode_cursor({"clicks": last.click_count, "id": last.id})
+        else:
+            next_cursor = _encode_cursor({"created_at": last.created_at.isoformat(), "id": last.id})
+
+    return links, next_cursor
+
+
 @router.get("/ai/link/my", response_model=list[ShortLinkOut])
 def list_my_links(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: LinkSort = "created",
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    links = (
-        db.query(ShortLink)
-        .filter(ShortLink.user_id == current_user.id)
-        .order_by(ShortLink.created_at.desc())
-        .all()
-    )
+    links, next_cursor = _page_user_links(db, current_user.id, sort, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return links
 
 
 @router.get("/r/{short_code}")
-def redirect_short_link(short_code: str, db: Session = Depends(get_db)):
-    link = db.query(ShortLink).filter(ShortLink.short_code == short_code).first()
-    if not link:
+def redirect_short_link(short_code: str, request: Request, db: Session = Depends(get_db)):
+    resolved = resolve_short_code(db, short_code)
+    if not resolved:
         raise HTTPException(status_code=404, detail="Short link not found")
 
-    link.click_count += 1
-    db.commit()
+    link_id, original_url = resolved
+    click_aggregator.record(
+        link_id,
+        referrer=request.headers.get("referer") or request.headers.get("referrer"),
+        user_agent=request.headers.get("user-agent"),
+    )
+
+    return RedirectResponse(url=original_url, status_code=307)
+
+
+@router.get("/ai/link/cache/stats")
+def get_short_link_cache_stats(current_user=Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required.")
+
+    return short_link_cache.stats()
+
+
+@router.get("/ai/link/clicks/stats")
+def get_short_link_click_stats(current_user=Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required.")
+
+    return click_aggregator.stats()
 
-    return RedirectResponse(url=link.original_url, status_code=307)
 
 @router.get("/ai/link/analytics", response_model=ShortLinkAnalyticsSummary)
 def get_my_link_analytics(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: LinkSort = "created",
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    links = (
-        db.query(ShortLink)
+    total_links, total_clicks = (
+        db.query(func.count(ShortLink.id), func.coalesce(func.sum(ShortLink.click_count), 0))
         .filter(ShortLink.user_id == current_user.id)
-        .order_by(ShortLink.created_at.desc())
-        .all()
+        .one()
     )
 
-    total_clicks = sum(link.click_count for link in links)
+    links, next_cursor = _page_user_links(db, current_user.id, sort, cursor, limit)
 
     return ShortLinkAnalyticsSummary(
-        total_links=len(links),
+        total_links=total_links,
         total_clicks=total_clicks,
         links=links,
+        next_cursor=next_cursor,
     )
 
 
@@ -112,4 +326,93 @@ def get_single_link_analytics(
     if not link:
         raise HTTPException(status_code=404, detail="Short link not found")
 
-    return link
\ No newline at end of file
+    return link
+
+
+def _require_owned_link(db: Session, link_id: int, user_id: str):
+    exists = (
+        db.query(ShortLink.id)
+        .filter(ShortLink.id == link_id, ShortLink.user_id == user_id)
+        .first()
+    )
+    if not exists:
+        raise HTTPException(status_code=404, detail="Short link not found")
+
+
+@router.get("/ai/link/analytics/{link_id}/daily", response_model=ShortLinkClickSeries)
+def get_link_daily_clicks(
+    link_id: int,
+    days: int = Query(90, ge=1, le=366),
+    db: Session = Depends(get_db),
+    adb: Session = Depends(get_analytics_db),
+    current_user=Depends(get_current_user),
+):
+    _require_owned_link(db, link_id, current_user.id)
+
+    today = datetime.now(timezone.utc).date()
+    start = today - timedelta(days=days - 1)
+
+    rows = (
+        adb.query(ShortLinkClickDaily.day, ShortLinkClickDaily.clicks)
+        .filter(
+            ShortLinkClickDaily.short_link_id == link_id,
+            ShortLinkClickDaily.day >= start,
+        )
+        .all()
+    )
+    by_day = {row.day: row.clicks for row in rows}
+
+    buckets = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        buckets.append(
+            ShortLinkClickBucket(
+                bucket_start=datetime(day.year, day.month, day.day),
+                clicks=by_day.get(day, 0),
+            )
+        )
+
+    return ShortLinkClickSeries(
+        link_id=link_id,
+        interval="day",
+        total_clicks=sum(b.clicks for b in buckets),
+        buckets=buckets,
+    )
+
+
+@router.get("/ai/link/analytics/{link_id}/hourly", response_model=ShortLinkClickSeries)
+def get_link_hourly_clicks(
+    link_id: int,
+    hours: int = Query(48, ge=1, le=24 * 31),
+    db: Session = Depends(get_db),
+    adb: Session = Depends(get_analytics_db),
+    current_user=Depends(get_current_user),
+):
+    _require_owned_link(db, link_id, current_user.id)
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    start = now - timedelta(hours=hours - 1)
+
+    rows = (
+        adb.query(ShortLinkClickHourly.bucket_start, ShortLinkClickHourly.clicks)
+        .filter(
+            ShortLinkClickHourly.short_link_id == link_id,
+            ShortLinkClickHourly.bucket_start >= start,
+        )
+        .all()
+    )
+    by_hour = {row.bucket_start: row.clicks for row in rows}
+
+    buckets = []
+    for i in range(hours):
+        bucket_start = start + timedelta(hours=i)
+        buckets.append(
+            ShortLinkClickBucket(bucket_start=bucket_start, clicks=by_hour.get(bucket_start, 0))
+        )
+
+    return ShortLinkClickSeries(
+        link_id=link_id,
+        interval="hour",
+        total_clicks=sum(b.clicks for b in buckets),
+        buckets=buckets,
+    )
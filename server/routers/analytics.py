@@ -0,0 +1,274 @@
+# server/routers/analytics.py
+
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Literal, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from db import get_analytics_db, get_db
+from models import Block, Page
+from routers.auth import get_current_user, UserOut
+from services.analytics_export import stream_analytics_export
+from services.campaigns import campaign_report
+from services.heavy_hitters import Dimension, heavy_hitters
+from services.tracking_timeseries import Interval, click_through_rate, page_time_series
+from services.unique_visitors import Period, unique_visitor_series
+
+router = APIRouter(prefix="/api/me/analytics", tags=["analytics"])
+
+
+class UniqueVisitorBucket(BaseModel):
+    start: date
+    uniques: int
+
+
+class UniqueVisitorSeries(BaseModel):
+    period: Period
+    block_id: Optional[int] = None
+    total: int  # distinct visitors over the whole range, not the sum of buckets
+    buckets: List[UniqueVisitorBucket]
+
+
+class BlockSeries(BaseModel):
+    block_id: int
+    label: Optional[str] = None  # None once the block has been deleted
+    clicks: List[int]
+    ctr: List[float]
+
+
+class TimeSeries(BaseModel):
+    interval: Interval
+    buckets: List[datetime]  # bucket starts, UTC
+    views: List[int]
+    clicks: List[int]
+    ctr: List[float]  # clicks / views, 0 for buckets without views
+    blocks: List[BlockSeries]
+
+
+class TopItem(BaseModel):
+    value: str  # referrer host, "(direct)", or block id
+    label: Optional[str] = None  # block label, for dimension=block
+    count: int
+    error: int  # count may be overestimated by up to this much
+
+
+class TopItems(BaseModel):
+    dimension: Dimension
+    days: int
+    total: int
+    items: List[TopItem]
+
+
+class CampaignItem(BaseModel):
+    source: Optional[str] = None
+    medium: Optional[str] = None
+    campaign: Optional[str] = None
+    views: int
+    clicks: int
+    ctr: float  # clicks / views, 0 without views
+
+
+class CampaignReport(BaseModel):
+    days: int
+    items: List[CampaignItem]
+
+
+def _get_page_id(db: Session, user_id: str) -> Optional[int]:
+    row = db.query(Page.id).filter(Page.owner_id == user_id).first()
+    return row.id if row else None
+
+
+@router.get("/export")
+def export_analytics(
+    kind: Literal["views", "clicks", "short_links"] = "views",
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: UserOut = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream raw page views, link clicks or short-link clicks as CSV or
+    NDJSON, optionally limited to [start, end).
+    """
+    page_id = None
+    if kind != "short_links":
+        page_id = _get_page_id(db, current_user.id)
+        if page_id is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found.")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{kind}.{'csv' if format == 'csv' else 'ndjson'}"
+
+    return StreamingResponse(
+        stream_analytics_export(kind, format, current_user.id, page_id, start, end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/uniques", response_model=UniqueVisitorSeries)
+def get_unique_visitors(
+    period: Period = "day",
+    days: int = Query(30, ge=1, le=366),
+    block_id: Optional[int] = None,
+    current_user: UserOut = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    adb: Session = Depends(get_analytics_db),
+):
+    """
+    Approximate unique visitors (by IP and user agent) to your page, or to
+    one block's link, over the last `days` days. Weeks start on Monday;
+    the first bucket may be partial.
+    """
+    page_id = _get_page_id(db, current_user.id)
+    if page_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found.")
+
+    end = datetime.now(timezone.utc).date()
+    buckets, total = unique_visitor_series(
+        adb, page_id, end - timedelta(days=days - 1), end, period, block_id or 0
+    )
+    return UniqueVisitorSeries(
+        period=period,
+        block_id=block_id,
+        total=total,
+        buckets=[UniqueVisitorBucket(start=day, uniques=n) for day, n in buckets],
+    )
+
+
+@router.get("/top", response_model=TopItems)
+def get_top_items(
+    dimension: Dimension = "referrer",
+    days: int = Query(7, ge=1, le=92),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: UserOut = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    adb: Session = Depends(get_analytics_db),
+):
+    """
+    Top referrers (by host) of your page views, or your most clicked
+    blocks, over the last `days` days including today.
+    """
+    page_id = _get_page_id(db, current_user.id)
+    if page_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found.")
+
+    end = datetime.now(timezone.utc).date()
+    top, total = heavy_hitters.top(adb, page_id, dimension, end - timedelta(days=days - 1), end, limit)
+
+    labels = {}
+    if dimension == "block" and top:
+        labels = {
+            str(block_id): label
+            for block_id, label in db.query(Block.id, Block.label).filter(
+                Block.page_id == page_id, Block.id.in_([int(value) for value, _, _ in top])
+            )
+        }
+
+    return TopItems(
+        dimension=dimension,
+        days=days,
+        total=total,
+        items=[
+            TopItem(value=value, label=labels.get(value), count=count, error=error)
+            for value, count, error in top
+        ],
+    )
+
+
+@router.get("/timeseries", response_model=TimeSeries)
+def get_time_series(
+    interval: Interval = "day",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: UserOut = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    adb: Session = Depends(get_analytics_db),
+):
+    """
+    Views, clicks and click-through rate per day or hour for your page,
+    overall and per block, for the UTC days `start`..`end` (inclusive).
+    Defaults to the last 30 days, or the last 2 days for hourly series.
+    Hourly series only cover days still kept as raw events.
+    """
+    page_id = _get_page_id(db, current_user.id)
+    if page_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found.")
+
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29 if interval == "day" else 1)
+    max_days = 731 if interval == "day" else 31
+    if start > end or (end - start).days >= max_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"start must be on or before end, at most {max_days} days apart for {interval} series.",
+        )
+
+    series = page_time_series(adb, page_id, interval, start, end)
+    views = series["views"]
+
+    block_ids = series["block_ids"].tolist()
+    labels = dict(db.query(Block.id, Block.label).filter(Block.page_id == page_id).all())
+    # Blocks without clicks in the range still get an all-zero row
+    extra = sorted(set(labels) - set(block_ids))
+    block_clicks = series["block_clicks"]
+    if extra:
+        block_ids += extra
+        block_clicks = np.vstack([block_clicks, np.zeros((len(extra), len(views)), dtype=np.int64)])
+    block_ctr = click_through_rate(block_clicks, views)
+
+    return TimeSeries(
+        interval=interval,
+        buckets=[b.replace(tzinfo=timezone.utc) for b in series["buckets"].astype("datetime64[s]").tolist()],
+        views=views.tolist(),
+        clicks=series["clicks"].tolist(),
+        ctr=click_through_rate(series["clicks"], views).round(4).tolist(),
+        blocks=[
+            BlockSeries(
+                block_id=block_id,
+                label=labels.get(block_id),
+                clicks=block_clicks[i].tolist(),
+                ctr=block_ctr[i].round(4).tolist(),
+            )
+            for i, block_id in enumerate(block_ids)
+        ],
+    )
+
+
+@router.get("/campaigns", response_model=CampaignReport)
+def get_campaigns(
+    days: int = Query(30, ge=1, le=366),
+    current_user: UserOut = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    adb: Session = Depends(get_analytics_db),
+):
+    """
+    Views, clicks and click-through rate per UTM source/medium/campaign
+    for your page over the last `days` days including today. Traffic
+    without UTM parameters is left out.
+    """
+    page_id = _get_page_id(db, current_user.id)
+    if page_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page not found.")
+
+    end = datetime.now(timezone.utc).date()
+    rows = campaign_report(adb, page_id, end - timedelta(days=days - 1), end)
+    return CampaignReport(
+        days=days,
+        items=[
+            CampaignItem(
+                source=row.source or None,
+                medium=row.medium or None,
+                campaign=row.campaign or None,
+                views=row.views,
+                clicks=row.clicks,
+                ctr=round(row.clicks / row.views, 4) if row.views else 0.0,
+            )
+            for row in rows
+        ],
+    )
@@ -1,12 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from pydantic import BaseModel, HttpUrl
-from typing import List, Optional
-
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, HttpUrl, ValidationError, field_validator
+from typing import List, Literal, Optional
+import json
+import os
+
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from .auth import get_current_user  # returns UserInDB with id as UUID string
-from db import get_db
-from models import Page, Block, PageView, LinkClick
+from db import engine, get_db
+from models import Page, Block
+from services.block_ranks import (
+    BLOCK_ORDER,
+    RANK_MAX_LENGTH,
+    BlockOrderError,
+    block_position,
+    rank_between,
+    rank_between_blocks,
+    rank_for_end,
+    rank_for_position,
+    rebalance_page,
+    spread_ranks,
+)
+from services.page_renderer import publish_static_page
+from services.public_page_cache import CachedPage, public_page_cache
+from services.tracking_ingest import tracking_event, tracking_queue, tracking_targets
+from services.tracking_sampling import tracking_sampler
+from services.view_dedup import view_dedup
+from utils.client_ip import client_ip
+
+TRACK_BATCH_MAX_EVENTS = int(os.getenv("TRACK_BATCH_MAX_EVENTS", "200"))
 
 router = APIRouter(
     prefix="/content",
@@ -35,17 +59,47 @@ class BlockCreate(BaseModel):
     label: str
     url: HttpUrl
     is_primary: bool = False
-    sort_order: Optional[int] = None
+    sort_order: Optional[int] = None  # 1-based position; default: end of page
     is_active: bool = True
 
 
-class BlockUpdate(BaseModel):
+class BlockPlacement(BaseModel):
+    # Alternative to sort_order: place the block between two neighbors
+    after_block_id: Optional[int] = None
+    before_block_id: Optional[int] = None
+
+
+class BlockCreateIn(BlockCreate, BlockPlacement):
+    pass
+
+
+class BlockUpdate(BlockPlacement):
     label: Optional[str] = None
     url: Optional[HttpUrl] = None
     is_primary: Optional[bool] = None
-    sort_order: Optional[int] = None
+    sort_order: Optional[int] = None  # move to this 1-based position
     is_active: Optional[bool] = None
 
+    @field_validator("label", "is_primary", "is_active")
+    @classmethod
+    def _not_null(cls, value):
+        # Omit a field to leave it unchanged; null is not a valid value.
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
+class BlockUpsert(BlockUpdate):
+    id: Optional[int] = None  # omit to create a new block
+
+
+class BlockBulkUpsert(BaseModel):
+    blocks: List[BlockUpsert]
+
+
+class BlockReorder(BaseModel):
+    block_ids: List[int]  # every block on the page, in display order
+
 
 class BlockOut(BlockCreate):
     id: int
@@ -60,17 +114,35 @@ class PublicPageResponse(BaseModel):
 
 class TrackViewIn(BaseModel):
     slug: str  # page slug
+    landing_url: Optional[str] = None  # location.href, for UTM parameters
+    referrer: Optional[str] = None  # document.referrer; "" for direct visits
 
 
 class TrackClickIn(BaseModel):
     slug: str      # page slug (for safety)
     block_id: int  # which block was clicked
+    landing_url: Optional[str] = None
+    referrer: Optional[str] = None
 
 
 class TrackResponse(BaseModel):
     ok: bool
 
 
+class TrackEventIn(BaseModel):
+    type: Literal["view", "click"]
+    slug: str
+    block_id: Optional[int] = None  # required for clicks
+    landing_url: Optional[str] = None
+    referrer: Optional[str] = None
+
+
+class TrackBatchResponse(TrackResponse):
+    accepted: int
+    duplicates: int = 0  # repeat views inside the dedup window, not stored
+    rejected: int
+
+
 # ------------------------
 # Helper functions
 # ------------------------
@@ -87,7 +159,7 @@ def _page_to_schema(page: Page) -> PageOut:
     )
 
 
-def _block_to_schema(block: Block) -> BlockOut:
+def _block_to_schema(block: Block, position: Optional[int] = None) -> BlockOut:
     return BlockOut(
         id=block.id,
         page_id=block.page_id,
@@ -95,7 +167,7 @@ def _block_to_schema(block: Block) -> BlockOut:
         label=block.label,
         url=block.url,
         is_primary=block.is_primary,
-        sort_order=block.sort_order,
+        sort_order=position if position is not None else block.sort_order,
         is_active=block.is_active,
     )
 
@@ -108,6 +180,50 @@ def _get_page_by_slug(db: Session, slug: str) -> Optional[Page]:
     return db.query(Page).filter(Page.slug == slug).first()
 
 
+def _build_public_page_json(db: Session, page: Page) -> str:
+    blocks = (
+        db.query(Block)
+        .filter(Block.page_id == page.id, Block.is_active.is_(True))
+        .order_by(*BLOCK_ORDER)
+        .all()
+    )
+    return PublicPageResponse(
+        page=_page_to_schema(page),
+        blocks=[_block_to_schema(b, i + 1) for i, b in enumerate(blocks)],
+    ).model_dump_json()
+
+
+def rebuild_page_snapshot(db: Session, page: Page):
+    """
+    Regenerate the page's public snapshot. Call before committing any
+    change to the page or its blocks so both land in one transaction.
+    """
+    db.flush()
+    page.snapshot_json = _build_public_page_json(db, page)
+    page.version = Page.version + 1
+
+
+def backfill_page_snapshots(bind=engine) -> int:
+    """Build the snapshot of every page last written before snapshots existed."""
+    with Session(bind) as db:
+        pages = db.query(Page).filter(Page.snapshot_json.is_(None)).all()
+        for page in pages:
+            rebuild_page_snapshot(db, page)
+        db.commit()
+    return len(pages)
+
+
+def _publish_page_change(page: Page, old_slug: Optional[str] = None):
+    """
+    After commit: drop cached copies of the page and re-render its static
+    HTML. Pass the previous slug when the page was renamed.
+    """
+    slugs = [page.slug, *([old_slug] if old_slug else [])]
+    public_page_cache.bump(page.id, page.version, *slugs)
+    tracking_targets.invalidate(*slugs)
+    publish_static_page(page.slug, page.snapshot_json, old_slug)
+
+
 def _require_page_for_owner(db: Session, user_id: str) -> Page:
     page = _get_page_by_owner(db, user_id)
     if not page:
@@ -148,6 +264,7 @@ def upsert_my_page(
     user_id = current_user.id
 
     page = _get_page_by_owner(db, user_id)
+    old_slug = page.slug if page else None
     if page:
         # Update existing page
         page.slug = payload.slug
@@ -167,8 +284,10 @@ def upsert_my_page(
         )
         db.add(page)
 
+    rebuild_page_snapshot(db, page)
     db.commit()
     db.refresh(page)
+    _publish_page_change(page, old_slug)
     return _page_to_schema(page)
 
 
@@ -182,23 +301,56 @@ def list_my_blocks(
     db: Session = Depends(get_db),
 ):
     """
-    List all blocks (links) for the current user's page, ordered by sort_order then id.
+    List all blocks (links) for the current user's page in display order.
+    sort_order in the response is each block's 1-based position.
     """
     page = _require_page_for_owner(db, current_user.id)
+    return _list_page_blocks(db, page)
 
-    blocks = (
-        db.query(Block)
-        .filter(Block.owner_id == current_user.id, Block.page_id == page.id)
-        .order_by(Block.sort_order.is_(None), Block.sort_order, Block.id)
-        .all()
-    )
 
-    return [_block_to_schema(b) for b in blocks]
+def _placement_rank(db: Session, page_id: int, payload, exclude_id: Optional[int] = None) -> Optional[str]:
+    """
+    Rank for the position requested by `payload` (neighbors or sort_order),
+    or None if it asks for no particular position.
+    """
+    try:
+        rank = _requested_rank(db, page_id, payload, exclude_id)
+        if rank is None or len(rank) <= RANK_MAX_LENGTH:
+            return rank
+    except ValueError:
+        # Two neighboring blocks ended up with the same rank (concurrent inserts)
+        pass
+
+    # Respread the page and place again
+    rebalance_page(db, page_id)
+    db.flush()
+    return _requested_rank(db, page_id, payload, exclude_id)
+
+
+def _requested_rank(db: Session, page_id: int, payload, exclude_id: Optional[int]) -> Optional[str]:
+    if payload.after_block_id is not None or payload.before_block_id is not None:
+        try:
+            rank = rank_between_blocks(
+                db, page_id, payload.after_block_id, payload.before_block_id, exclude_id
+            )
+        except BlockOrderError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if rank is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Neighbor block not found on your page.",
+            )
+        return rank
+
+    if payload.sort_order is not None:
+        return rank_for_position(db, page_id, payload.sort_order, exclude_id)
+
+    return None
 
 
 @router.post("/me/blocks", response_model=BlockOut, status_code=status.HTTP_201_CREATED)
 def create_block(
-    payload: BlockCreate,
+    payload: BlockCreateIn,
     current_user=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -207,17 +359,9 @@ def create_block(
     """
     page = _require_page_for_owner(db, current_user.id)
 
-    # If sort_order not given, put it at the end
-    if payload.sort_order is None:
-        existing_blocks = (
-            db.query(Block)
-            .filter(Block.owner_id == current_user.id, Block.page_id == page.id)
-            .all()
-        )
-        max_order = max((b.sort_order or 0 for b in existing_blocks), default=0)
-        sort_order = max_order + 1
-    else:
-        sort_order = payload.sort_order
+    rank = _placement_rank(db, page.id, payload)
+    if rank is None:
+        rank = rank_for_end(db, page.id)
 
     block = Block(
         page_id=page.id,
@@ -225,15 +369,165 @@ def create_block(
         label=payload.label,
         url=str(payload.url),
         is_primary=payload.is_primary,
-        sort_order=sort_order,
+        rank=rank,
         is_active=payload.is_active,
     )
 
     db.add(block)
+    rebuild_page_snapshot(db, page)
     db.commit()
     db.refresh(block)
+    _publish_page_change(page)
+
+    return _block_to_schema(block, block_position(db, block))
+
+
+def _list_page_blocks(db: Session, page: Page) -> List[BlockOut]:
+    blocks = (
+        db.query(Block)
+        .filter(Block.page_id == page.id)
+        .order_by(*BLOCK_ORDER)
+        .all()
+    )
+    return [_block_to_schema(b, i + 1) for i, b in enumerate(blocks)]
+
+
+@router.put("/me/blocks/order", response_model=List[BlockOut])
+def reorder_blocks(
+    payload: BlockReorder,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Reorder all blocks on the current user's page in one request.
+    block_ids must list every block on the page exactly once.
+    """
+    page = _require_page_for_owner(db, current_user.id)
+
+    owned_ids = {
+        row.id
+        for row in db.query(Block.id)
+        .filter(Block.owner_id == current_user.id, Block.page_id == page.id)
+        .all()
+    }
+    if len(payload.block_ids) != len(set(payload.block_ids)) or set(payload.block_ids) != owned_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="block_ids must contain every block on your page exactly once.",
+        )
+
+    if payload.block_ids:
+        db.execute(
+            update(Block),
+            [
+                {"id": block_id, "rank": rank}
+                for block_id, rank in zip(payload.block_ids, spread_ranks(len(payload.block_ids)))
+            ],
+        )
+
+    rebuild_page_snapshot(db, page)
+    db.commit()
+    _publish_page_change(page)
+
+    return _list_page_blocks(db, page)
+
+
+@router.post("/me/blocks/bulk", response_model=List[BlockOut])
+def bulk_upsert_blocks(
+    payload: BlockBulkUpsert,
+    current_user=Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Create and update many blocks in one transaction. Items with an id
+    update that block (only the fields given); items without one create a
+    new block and need at least label and url.
+    """
+    page = _require_page_for_owner(db, current_user.id)
 
-    return _block_to_schema(block)
+    ids = [item.id for item in payload.blocks if item.id is not None]
+    owned_ids = {
+        row.id
+        for row in db.query(Block.id)
+        .filter(Block.id.in_(ids), Block.owner_id == current_user.id, Block.page_id == page.id)
+        .all()
+    } if ids else set()
+
+    if len(ids) != len(set(ids)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each block id may only appear once.",
+        )
+    unknown = sorted(set(ids) - owned_ids)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Blocks not found: {unknown}.",
+        )
+
+    placement = {"sort_order", "after_block_id", "before_block_id"}
+    updates = []
+    moves = []
+    new_items = []
+    for index, item in enumerate(payload.blocks):
+        data = item.model_dump(exclude_unset=True, exclude={"id"} | placement)
+        if "url" in data:
+            if data["url"] is None:
+                del data["url"]
+            else:
+                data["url"] = str(data["url"])
+
+        if item.id is not None:
+            if data:
+                updates.append({"id": item.id, **data})
+            if item.model_fields_set & placement:
+                moves.append(item)
+            continue
+
+        if not data.get("label") or not data.get("url"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"blocks[{index}]: new blocks need a label and url.",
+            )
+        new_items.append((item, data))
+
+    if updates:
+        db.execute(update(Block), updates)
+
+    # Each positioned block is placed against the ranks written so far,
+    # so moves apply in request order.
+    for item in moves:
+        db.execute(
+            update(Block)
+            .where(Block.id == item.id)
+            .values(rank=_placement_rank(db, page.id, item, exclude_id=item.id))
+        )
+
+    last_rank = None
+    for item, data in new_items:
+        db.flush()
+        rank = _placement_rank(db, page.id, item)
+        if rank is None:
+            # Appended blocks chain off each other without another query.
+            last_rank = rank_between(last_rank, None) if last_rank else rank_for_end(db, page.id)
+            rank = last_rank
+        db.add(
+            Block(
+                page_id=page.id,
+                owner_id=current_user.id,
+                label=data["label"],
+                url=data["url"],
+                is_primary=data.get("is_primary") or False,
+                rank=rank,
+                is_active=True if data.get("is_active") is None else data["is_active"],
+            )
+        )
+
+    rebuild_page_snapshot(db, page)
+    db.commit()
+    _publish_page_change(page)
+
+    return _list_page_blocks(db, page)
 
 
 @router.patch("/me/blocks/{block_id}", response_model=BlockOut)
@@ -262,14 +556,18 @@ def update_block(
         block.url = str(data["url"]) if data["url"] is not None else block.url
     if "is_primary" in data:
         block.is_primary = data["is_primary"]
-    if "sort_order" in data:
-        block.sort_order = data["sort_order"]
     if "is_active" in data:
         block.is_active = data["is_active"]
 
+    rank = _placement_rank(db, block.page_id, payload, exclude_id=block.id)
+    if rank is not None:
+        block.rank = rank
+
+    rebuild_page_snapshot(db, block.page)
     db.commit()
     db.refresh(block)
-    return _block_to_schema(block)
+    _publish_page_change(block.page)
+    return _block_to_schema(block, block_position(db, block))
 
 
 @router.delete("/me/blocks/{block_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -289,8 +587,12 @@ def delete_block(
     if not block:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Block not found.")
 
+    page = block.page
+
     db.delete(block)
+    rebuild_page_snapshot(db, page)
     db.commit()
+    _publish_page_change(page)
     return
 
 
@@ -301,103 +603,245 @@ def delete_block(
 @router.get("/public/pages/{slug}", response_model=PublicPageResponse)
 def get_public_page_by_slug(
     slug: str,
+    request: Request,
     db: Session = Depends(get_db),
 ):
     """
     Public endpoint: fetch a page + its active blocks by slug.
     This is what the public MyShortBIZ profile will use.
+
+    Serves the page's stored snapshot, cached per slug until the page or
+    its blocks change, with an ETag so clients can revalidate with a 304.
     """
-    page = _get_page_by_slug(db, slug)
-    if not page:
+    entry = public_page_cache.get(slug)
+
+    if entry is not None and public_page_cache.needs_check(entry):
+        # Edits made by other workers only show up in the database; checking
+        # the version is much cheaper than loading the snapshot again.
+        version = db.query(Page.version).filter(Page.slug == slug).scalar()
+        if version == entry.version:
+            public_page_cache.checked(entry)
+        else:
+            entry = None
+
+    if entry is None:
+        # The version is read in the same statement as the snapshot, so the
+        # two always belong together.
+        row = (
+            db.query(Page.id, Page.version, Page.snapshot_json)
+            .filter(Page.slug == slug)
+            .first()
+        )
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Page not found.",
+            )
+
+        version, snapshot = row.version, row.snapshot_json
+        if snapshot is None:
+            # Not backfilled yet (see backfill_page_snapshots); build it
+            # without storing so reads never write.
+            snapshot = _build_public_page_json(db, db.get(Page, row.id))
+
+        entry = CachedPage(row.id, version, snapshot.encode())
+        public_page_cache.set(slug, entry)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def _request_origin(request: Request) -> dict:
+    return {
+        "ip_address": client_ip(request),
+        "user_agent": request.headers.get("user-agent"),
+        "referrer": request.headers.get("referer") or request.headers.get("referrer"),
+    }
+
+
+def _event_origin(origin: dict, referrer: Optional[str]) -> dict:
+    """
+    Prefer the referrer the page reports over the tracking request's own
+    Referer header, which is just the profile page itself.
+    """
+    if referrer is None:
+        return origin
+    return {**origin, "referrer": referrer or None}
+
+
+def _submit_events(events: list[dict]):
+    if not tracking_queue.submit(events):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Tracking is busy, try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _track(
+    db: Session,
+    request: Request,
+    slug: str,
+    block_id: Optional[int] = None,
+    landing_url: Optional[str] = None,
+    referrer: Optional[str] = None,
+):
+    target = tracking_targets.resolve(db, slug)
+    if target is None or (block_id is not None and block_id not in target.block_ids):
+        # Possibly created by another worker since it was cached
+        target = tracking_targets.resolve(db, slug, recheck=True)
+    if target is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Page not found.",
         )
+    if block_id is not None and block_id not in target.block_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Block not found for this page.",
+        )
 
-    blocks = (
-        db.query(Block)
-        .filter(Block.page_id == page.id, Block.is_active.is_(True))
-        .order_by(Block.sort_order.is_(None), Block.sort_order, Block.id)
-        .all()
-    )
+    origin = _event_origin(_request_origin(request), referrer)
+    if block_id is None and not view_dedup.should_record(
+        target.page_id, origin["ip_address"], origin["user_agent"]
+    ):
+        return
 
-    return PublicPageResponse(
-        page=_page_to_schema(page),
-        blocks=[_block_to_schema(b) for b in blocks],
+    _submit_events([tracking_event(target.page_id, block_id, landing_url=landing_url, **origin)])
+
+
+def _parse_track_batch(body: bytes) -> list:
+    """
+    Parse a JSON array (or {"events": [...]}) of tracking events. The body
+    is read as JSON whatever its content type, since navigator.sendBeacon
+    posts strings as text/plain. Invalid events come back as None.
+    """
+    try:
+        data = json.loads(body.decode("utf-8-sig"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of events.")
+    rows = data.get("events") if isinstance(data, dict) else data
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array of events.")
+    if len(rows) > TRACK_BATCH_MAX_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {TRACK_BATCH_MAX_EVENTS} events per batch.",
+        )
+
+    events = []
+    for row in rows:
+        try:
+            events.append(TrackEventIn.model_validate(row))
+        except ValidationError:
+            events.append(None)
+    return events
+
+
+def _track_batch(db: Session, events: list, origin: dict) -> TrackBatchResponse:
+    targets = tracking_targets.resolve_many(db, {e.slug for e in events if e is not None})
+    # Possibly created by another worker since they were cached
+    stale = {
+        e.slug
+        for e in events
+        if e is not None
+        and (
+            e.slug not in targets
+            or (e.type == "click" and e.block_id not in targets[e.slug].block_ids)
+        )
+    }
+    if stale:
+        targets.update(tracking_targets.resolve_many(db, stale, recheck=stale))
+
+    accepted = []
+    duplicates = 0
+    for e in events:
+        target = targets.get(e.slug) if e is not None else None
+        if target is None:
+            continue
+        if e.type == "click":
+            if e.block_id not in target.block_ids:
+                continue
+            accepted.append(
+                tracking_event(
+                    target.page_id,
+                    e.block_id,
+                    landing_url=e.landing_url,
+                    **_event_origin(origin, e.referrer),
+                )
+            )
+        elif view_dedup.should_record(target.page_id, origin["ip_address"], origin["user_agent"]):
+            accepted.append(
+                tracking_event(target.page_id, landing_url=e.landing_url, **_event_origin(origin, e.referrer))
+            )
+        else:
+            duplicates += 1
+
+    _submit_events(accepted)
+    return TrackBatchResponse(
+        ok=True,
+        accepted=len(accepted),
+        duplicates=duplicates,
+        rejected=len(events) - len(accepted) - duplicates,
     )
 
 
-@router.post("/public/track/view", response_model=TrackResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/public/track/view", response_model=TrackResponse, status_code=status.HTTP_202_ACCEPTED)
 def track_page_view(
     payload: TrackViewIn,
     request: Request,
     db: Session = Depends(get_db),
 ):
     """
-    Track a public page view by slug.
+    Track a public page view by slug. The view is queued and written in
+    the background; repeats from the same visitor within
+    TRACKING_DEDUP_WINDOW seconds are ignored.
     """
-    page = _get_page_by_slug(db, payload.slug)
-    if not page:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Page not found.",
-        )
-
-    ip = request.client.host if request.client else None
-    ua = request.headers.get("user-agent")
-    ref = request.headers.get("referer") or request.headers.get("referrer")
-
-    view = PageView(
-        page_id=page.id,
-        ip_address=ip,
-        user_agent=ua,
-        referrer=ref,
-    )
-    db.add(view)
-    db.commit()
-
+    _track(db, request, payload.slug, landing_url=payload.landing_url, referrer=payload.referrer)
     return TrackResponse(ok=True)
 
 
-@router.post("/public/track/click", response_model=TrackResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/public/track/click", response_model=TrackResponse, status_code=status.HTTP_202_ACCEPTED)
 def track_link_click(
     payload: TrackClickIn,
     request: Request,
     db: Session = Depends(get_db),
 ):
     """
-    Track a public link click for a specific block on a page.
+    Track a public link click for a specific block on a page. The click is
+    queued and written in the background.
     """
-    page = _get_page_by_slug(db, payload.slug)
-    if not page:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Page not found.",
-        )
+    _track(db, request, payload.slug, payload.block_id, payload.landing_url, payload.referrer)
+    return TrackResponse(ok=True)
 
-    block = (
-        db.query(Block)
-        .filter(Block.id == payload.block_id, Block.page_id == page.id)
-        .first()
-    )
-    if not block:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Block not found for this page.",
-        )
 
-    ip = request.client.host if request.client else None
-    ua = request.headers.get("user-agent")
-    ref = request.headers.get("referer") or request.headers.get("referrer")
+@router.post("/public/track/batch", response_model=TrackBatchResponse, status_code=status.HTTP_202_ACCEPTED)
+async def track_batch(
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Track many views and clicks in one request, e.g. from navigator.sendBeacon
+    on page unload. Accepts a JSON array of {"type", "slug", "block_id",
+    "landing_url", "referrer"} as application/json or text/plain. Unknown or invalid
+    events are skipped.
+    """
+    events = _parse_track_batch(await request.body())
+    return await run_in_threadpool(_track_batch, db, events, _request_origin(request))
 
-    click = LinkClick(
-        page_id=page.id,
-        block_id=block.id,
-        ip_address=ip,
-        user_agent=ua,
-        referrer=ref,
-    )
-    db.add(click)
-    db.commit()
 
-    return TrackResponse(ok=True)
+@router.get("/track/stats")
+def get_tracking_queue_stats(current_user=Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required.")
+
+    return {
+        **tracking_queue.stats(),
+        "dedup": view_dedup.stats(),
+        "sampling": tracking_sampler.stats(),
+    }
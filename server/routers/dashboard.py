@@ -2,11 +2,11 @@
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from db import get_db
+from db import get_analytics_db, get_db
 from routers.auth import get_current_user, UserOut
-from models import User, Blog, Page, PageView, LinkClick, Subscription, Plan
+from models import User, Blog, Page, Subscription, Plan
+from services.tracking_counters import page_counters
 
 router = APIRouter(prefix="/api/me", tags=["dashboard"])
 
@@ -15,6 +15,7 @@ router = APIRouter(prefix="/api/me", tags=["dashboard"])
 def get_dashboard(
     current_user: UserOut = Depends(get_current_user),
     db: Session = Depends(get_db),
+    adb: Session = Depends(get_analytics_db),
 ):
     user = db.query(User).filter(User.id == current_user.id).first()
 
@@ -25,8 +26,7 @@ def get_dashboard(
     total_views = 0
     total_clicks = 0
     if page:
-        total_views = db.query(PageView).filter(PageView.page_id == page.id).count()
-        total_clicks = db.query(LinkClick).filter(LinkClick.page_id == page.id).count()
+        total_views, total_clicks = page_counters(adb, page.id)
 
     sub = (
         db.query(Subscription)
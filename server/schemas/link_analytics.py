@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 from typing import Optional
 
@@ -18,4 +20,16 @@ class ShortLinkAnalyticsItem(BaseModel):
 class ShortLinkAnalyticsSummary(BaseModel):
     total_links: int
     total_clicks: int
-    links: list[ShortLinkAnalyticsItem]
\ No newline at end of file
+    links: list[ShortLinkAnalyticsItem]
+    next_cursor: Optional[str] = None
+
+class ShortLinkClickBucket(BaseModel):
+    bucket_start: datetime
+    clicks: int
+
+
+class ShortLinkClickSeries(BaseModel):
+    link_id: int
+    interval: str  # "hour" or "day"
+    total_clicks: int
+    buckets: list[ShortLinkClickBucket]
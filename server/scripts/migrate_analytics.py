@@ -0,0 +1,70 @@
+"""
+Copy tracking data written before the analytics database existed from the
+main database (DATABASE_URL) into the analytics one (ANALYTICS_DATABASE_URL).
+
+    cd server
+    python -m scripts.migrate_analytics            # copy
+    python -m scripts.migrate_analytics --drop     # copy, then drop the old tables
+
+Run it with the app stopped. Rows already present in the analytics
+database (same primary key) are skipped, so an interrupted run can simply
+be repeated. Tracking counters are rebuilt from the copied events.
+"""
+import argparse
+
+from sqlalchemy import inspect, select, tuple_
+
+import models  # noqa: F401  (registers every table on the metadata)
+from db import AnalyticsBase, analytics_engine, engine, sync_schema
+from services.tracking_counters import reconcile_counters
+from utils.sql import insert_ignore
+
+
+def _copy_table(table, chunk_size: int) -> int:
+    # Old copies may predate some columns; those are left to their defaults.
+    present = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    columns = [c for c in table.columns if c.name in present]
+    order = list(table.primary_key.columns)
+
+    copied = 0
+    last = None
+    while True:
+        stmt = select(*columns).order_by(*order).limit(chunk_size)
+        if last is not None:
+            # Keyset pagination over the (possibly composite) primary key
+            stmt = stmt.where(tuple_(*order) > tuple_(*last))
+        with engine.connect() as src:
+            rows = [dict(row._mapping) for row in src.execute(stmt)]
+        if not rows:
+            return copied
+        with analytics_engine.begin() as dst:
+            insert_ignore(dst, table, rows)
+        copied += len(rows)
+        last = [rows[-1][c.name] for c in order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--drop", action="store_true", help="drop the copied tables from the main database")
+    args = parser.parse_args()
+
+    AnalyticsBase.metadata.create_all(bind=analytics_engine)
+    sync_schema(analytics_engine, AnalyticsBase.metadata)
+
+    existing = set(inspect(engine).get_table_names())
+    # sorted_tables puts user_agents/referrers before the events using them
+    tables = [t for t in AnalyticsBase.metadata.sorted_tables if t.name in existing]
+    for table in tables:
+        print(f"{table.name}: copied {_copy_table(table, args.chunk_size)} rows")
+
+    reconcile_counters()
+
+    if args.drop:
+        for table in reversed(tables):
+            table.drop(engine)
+            print(f"{table.name}: dropped from main database")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Recompute the tracking counters from raw events plus compacted daily
+rollups, and report every counter that had drifted.
+
+    cd server
+    python -m scripts.reconcile_counters            # all pages
+    python -m scripts.reconcile_counters --page-id 3 --page-id 7
+"""
+import argparse
+
+from services.tracking_counters import reconcile_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-id", type=int, action="append", dest="page_ids")
+    args = parser.parse_args()
+
+    drift = reconcile_counters(page_ids=args.page_ids)
+    for page_id, rows in sorted(drift.items()):
+        for block_id, (stored, recounted) in sorted(rows.items()):
+            print(
+                f"page {page_id} block {block_id}: "
+                f"views {stored[0]} -> {recounted[0]}, clicks {stored[1]} -> {recounted[1]}"
+            )
+    print(f"{len(drift)} page(s) corrected")
+
+
+if __name__ == "__main__":
+    main()
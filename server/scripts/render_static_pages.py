@@ -0,0 +1,54 @@
+"""
+Re-render every public page to STATIC_PAGES_DIR (or --output).
+
+    cd server
+    python -m scripts.render_static_pages --workers 8
+
+Pages are split across worker processes; each worker only renders and
+writes files, all database access happens up front in the parent.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from db import SessionLocal
+from models import Page
+from services.page_renderer import STATIC_PAGES_DIR, write_static_page
+
+
+def _render_chunk(args) -> int:
+    output_dir, pages = args
+    return sum(write_static_page(output_dir, slug, snapshot) for slug, snapshot in pages)
+
+
+def _load_pages() -> list[tuple[str, str]]:
+    # Imported here so worker processes never load the API routers.
+    from routers.content import backfill_page_snapshots
+
+    backfill_page_snapshots()
+    with SessionLocal() as db:
+        return [tuple(row) for row in db.query(Page.slug, Page.snapshot_json).all()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=STATIC_PAGES_DIR or "static_pages")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    args = parser.parse_args()
+
+    pages = _load_pages()
+    chunks = [
+        (args.output, pages[i:i + args.chunk_size])
+        for i in range(0, len(pages), args.chunk_size)
+    ]
+
+    os.makedirs(args.output, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        written = sum(pool.map(_render_chunk, chunks))
+
+    print(f"Rendered {written} of {len(pages)} pages to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,14 @@ import os
 import random
 import re
 import string
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
 from urllib.parse import urlparse
 
 from dotenv import load_dotenv
 from openai import OpenAI
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from models import User
@@ -14,6 +18,11 @@ from models.short_link import ShortLink
 from schemas.ai_link import LinkGenerateRequest
 from services.ai_usage_service import log_ai_usage
 from services.ai_billing_service import calculate_platform_tokens
+from services.short_code_allocator import (
+    SHORT_CODE_MAX_ATTEMPTS,
+    ShortCodeAllocationError,
+    short_code_allocator,
+)
 
 load_dotenv()
 
@@ -25,6 +34,12 @@ if not OPENAI_API_KEY:
 
 client = OpenAI(api_key=OPENAI_API_KEY)
 
+LINK_BATCH_MAX_ITEMS = int(os.getenv("LINK_BATCH_MAX_ITEMS", "500"))
+LINK_BATCH_CONCURRENCY = int(os.getenv("LINK_BATCH_CONCURRENCY", "8"))
+# OpenAI tokens reserved per batch item before any call is made; the
+# unused part of the reservation is refunded once the batch is billed.
+LINK_BATCH_ESTIMATED_TOKENS = int(os.getenv("LINK_BATCH_ESTIMATED_TOKENS", "1000"))
+
 
 def _slugify(value: str) -> str:
     value = value.lower().strip()
@@ -38,14 +53,8 @@ def _random_suffix(length: int = 4) -> str:
     return "".join(random.choices(string.ascii_lowercase + string.digits, k=length))
 
 
-def _ensure_unique_short_code(db: Session, desired: str) -> str:
-    base = _slugify(desired) or _random_suffix(6)
-    candidate = base
-
-    while db.query(ShortLink).filter(ShortLink.short_code == candidate).first():
-        candidate = f"{base}-{_random_suffix(4)}"
-
-    return candidate
+def _short_code_base(desired: str) -> str:
+    return _slugify(desired) or _random_suffix(6)
 
 
 def build_link_prompt(req: LinkGenerateRequest) -> str:
@@ -103,7 +112,7 @@ def _fallback_payload(req: LinkGenerateRequest) -> dict:
     }
 
 
-def generate_short_link_record(req: LinkGenerateRequest, db: Session, user: User) -> tuple[ShortLink, int]:
+def _generate_link_metadata(req: LinkGenerateRequest):
     prompt = build_link_prompt(req)
 
     resp = client.responses.create(
@@ -118,14 +127,26 @@ def generate_short_link_record(req: LinkGenerateRequest, db: Session, user: User
     except Exception:
         payload = _fallback_payload(req)
 
-    raw_code = req.custom_slug or payload.get("short_code") or "link"
-    short_code = _ensure_unique_short_code(db, raw_code)
+    return payload, resp.usage
 
-    title = payload.get("title") or "Useful Link"
-    description = payload.get("description") or None
-    cta_text = payload.get("cta_text") or "Open Link"
 
-    usage = resp.usage
+def _build_short_link(req: LinkGenerateRequest, payload: dict, user: User, short_code: str) -> ShortLink:
+    return ShortLink(
+        user_id=user.id,
+        original_url=str(req.original_url),
+        short_code=short_code,
+        title=payload.get("title") or "Useful Link",
+        description=payload.get("description") or None,
+        cta_text=payload.get("cta_text") or "Open Link",
+    )
+
+
+def generate_short_link_record(req: LinkGenerateRequest, db: Session, user: User) -> tuple[ShortLink, int]:
+    payload, usage = _generate_link_metadata(req)
+
+    raw_code = req.custom_slug or payload.get("short_code") or "link"
+    base = _short_code_base(raw_code)
+
     prompt_tokens = usage.input_tokens
     completion_tokens = usage.output_tokens
     total_tokens = usage.total_tokens
@@ -144,19 +165,181 @@ def generate_short_link_record(req: LinkGenerateRequest, db: Session, user: User
     )
 
     platform_tokens = calculate_platform_tokens(total_tokens)
-    user.tokens_remaining -= platform_tokens
 
-    short_link = ShortLink(
-        user_id=user.id,
-        original_url=str(req.original_url),
-        short_code=short_code,
-        title=title,
-        description=description,
-        cta_text=cta_text,
+    # Insert optimistically; another worker may grab the same code between
+    # the availability check and the commit, which the unique index catches.
+    for _ in range(SHORT_CODE_MAX_ATTEMPTS):
+        short_code = short_code_allocator.allocate(db, [base])[0]
+        short_link = _build_short_link(req, payload, user, short_code)
+
+        user.tokens_remaining -= platform_tokens
+        db.add(short_link)
+        try:
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            short_code_allocator.record_conflicts(db, [short_code])
+    else:
+        raise ShortCodeAllocationError("Could not allocate a unique short code.")
+
+    db.refresh(short_link)
+
+    return short_link, platform_tokens
+
+
+def estimate_link_batch_tokens(count: int) -> int:
+    """Platform tokens to reserve for generating `count` links."""
+    if not count:
+        return 0
+    return calculate_platform_tokens(count * LINK_BATCH_ESTIMATED_TOKENS)
+
+
+def reserve_tokens(db: Session, user_id: str, tokens: int) -> bool:
+    """Take `tokens` from the user's balance if it holds that many."""
+    result = db.execute(
+        update(User)
+        .where(User.id == user_id, User.tokens_remaining >= tokens)
+        .values(tokens_remaining=User.tokens_remaining - tokens)
     )
+    db.commit()
+    return result.rowcount == 1
+
 
-    db.add(short_link)
+def _refund_tokens(db: Session, user_id: str, tokens: int):
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(tokens_remaining=User.tokens_remaining + tokens)
+    )
     db.commit()
-    db.refresh(short_link)
 
-    return short_link, platform_tokens
\ No newline at end of file
+
+def generate_short_link_batch(
+    items: list[LinkGenerateRequest | Exception],
+    db: Session,
+    user: User,
+    base_url: str,
+    reserved: int,
+) -> Iterator[dict]:
+    """
+    Create short links for a batch of requests, yielding one result dict
+    per item followed by a summary.
+
+    `reserved` tokens must already have been taken with reserve_tokens().
+    Metadata is generated concurrently (bounded by LINK_BATCH_CONCURRENCY),
+    then every link, one AI usage row and the final charge are written in
+    a single transaction. If the batch stops before that commit, the
+    reservation is refunded. Items that failed validation are passed in
+    as exceptions and reported as errors.
+    """
+    generated: dict[int, tuple[dict, object]] = {}
+    failed = 0
+    billed = False
+
+    try:
+        for index, item in enumerate(items):
+            if isinstance(item, Exception):
+                failed += 1
+                yield {"index": index, "ok": False, "error": str(item)}
+
+        with ThreadPoolExecutor(max_workers=LINK_BATCH_CONCURRENCY) as pool:
+            futures = {
+                pool.submit(_generate_link_metadata, item): index
+                for index, item in enumerate(items)
+                if not isinstance(item, Exception)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    generated[index] = future.result()
+                except Exception as exc:
+                    failed += 1
+                    yield {"index": index, "ok": False, "error": f"Metadata generation failed: {exc}"}
+
+        order = sorted(generated)
+        if not order:
+            _refund_tokens(db, user.id, reserved)
+            billed = True
+            yield {"done": True, "created": 0, "failed": failed, "tokens_used": 0, "tokens_remaining": user.tokens_remaining}
+            return
+
+        bases = [
+            _short_code_base(items[i].custom_slug or generated[i][0].get("short_code") or "link")
+            for i in order
+        ]
+
+        prompt_tokens = sum(generated[i][1].input_tokens for i in order)
+        completion_tokens = sum(generated[i][1].output_tokens for i in order)
+        total_tokens = sum(generated[i][1].total_tokens for i in order)
+        platform_tokens = calculate_platform_tokens(total_tokens)
+
+        for _ in range(SHORT_CODE_MAX_ATTEMPTS):
+            short_codes = short_code_allocator.allocate(db, bases)
+            links = [
+                _build_short_link(items[i], generated[i][0], user, code)
+                for i, code in zip(order, short_codes)
+            ]
+
+            log_ai_usage(
+                db=db,
+                user_id=user.id,
+                feature="link_batch",
+                model=OPENAI_MODEL,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=total_tokens,
+                cost_usd=total_tokens * 0.000002,
+                commit=False,
+            )
+            # Settle against the reservation in SQL so concurrent charges
+            # to the same user are not lost.
+            db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(tokens_remaining=User.tokens_remaining + reserved - platform_tokens)
+            )
+            db.add_all(links)
+            try:
+                db.flush()
+                # Read everything reported below before the commit expires it,
+                # rather than reloading each link afterwards.
+                created = [
+                    {
+                        "index": index,
+                        "ok": True,
+                        "id": link.id,
+                        "original_url": link.original_url,
+                        "short_code": link.short_code,
+                        "short_url": f"{base_url}/r/{link.short_code}",
+                        "title": link.title,
+                        "description": link.description,
+                        "cta_text": link.cta_text,
+                    }
+                    for index, link in zip(order, links)
+                ]
+                tokens_remaining = db.query(User.tokens_remaining).filter(User.id == user.id).scalar()
+                db.commit()
+                billed = True
+                break
+            except IntegrityError:
+                # A concurrent insert took one of the codes; the rollback also
+                # undoes the usage row and the charge, so the whole set is redone.
+                db.rollback()
+                short_code_allocator.record_conflicts(db, short_codes)
+        else:
+            raise ShortCodeAllocationError("Could not allocate unique short codes.")
+    finally:
+        if not billed:
+            db.rollback()
+            _refund_tokens(db, user.id, reserved)
+
+    yield from created
+
+    yield {
+        "done": True,
+        "created": len(created),
+        "failed": failed,
+        "tokens_used": platform_tokens,
+        "tokens_remaining": tokens_remaining,
+    }
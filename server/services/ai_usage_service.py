@@ -11,6 +11,7 @@ def log_ai_usage(
     completion_tokens: int,
     total_tokens: int,
     cost_usd: float,
+    commit: bool = True,
 ):
     usage = AIUsage(
         user_id=user_id,
@@ -22,4 +23,5 @@ def log_ai_usage(
         cost_usd=cost_usd,
     )
     db.add(usage)
-    db.commit()
\ No newline at end of file
+    if commit:
+        db.commit()
\ No newline at end of file
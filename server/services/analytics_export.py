@@ -0,0 +1,140 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import func, select
+
+from db import AnalyticsSessionLocal, SessionLocal
+from models.page import PageView, LinkClick
+from models.short_link import ShortLink
+from models.short_link_click import ShortLinkClickEvent
+from models.tracking_dimension import UserAgent, Referrer
+
+EXPORT_BATCH_SIZE = 1000
+# Short-link ids bound per query; stays well below SQLite's 32766 variables.
+EXPORT_LINK_CHUNK = 500
+
+
+def _tracking_statement(model, page_id: int, extra_columns: list):
+    ua = UserAgent.__table__.alias("ua")
+    ref = Referrer.__table__.alias("ref")
+    return (
+        select(
+            model.id,
+            model.created_at,
+            *extra_columns,
+            model.sample_weight,
+            model.ip_address,
+            func.coalesce(ua.c.value, model.user_agent).label("user_agent"),
+            func.coalesce(ref.c.value, model.referrer).label("referrer"),
+            model.utm_source,
+            model.utm_medium,
+            model.utm_campaign,
+        )
+        .outerjoin(ua, ua.c.id == model.user_agent_id)
+        .outerjoin(ref, ref.c.id == model.referrer_id)
+        .where(model.page_id == page_id)
+    )
+
+
+def _export_statement(
+    kind: str,
+    page_id: Optional[int],
+    link_ids: list[int],
+    start: Optional[datetime],
+    end: Optional[datetime],
+):
+    if kind == "short_links":
+        model = ShortLinkClickEvent
+        stmt = select(
+            ShortLinkClickEvent.id,
+            ShortLinkClickEvent.created_at,
+            ShortLinkClickEvent.short_link_id,
+            ShortLinkClickEvent.user_agent,
+            ShortLinkClickEvent.referrer,
+        ).where(ShortLinkClickEvent.short_link_id.in_(link_ids))
+    elif kind == "clicks":
+        model = LinkClick
+        stmt = _tracking_statement(LinkClick, page_id, [LinkClick.block_id])
+    else:
+        model = PageView
+        stmt = _tracking_statement(PageView, page_id, [])
+
+    if start is not None:
+        stmt = stmt.where(model.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(model.created_at < end)
+
+    return stmt.order_by(model.created_at, model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def stream_analytics_export(
+    kind: str,
+    fmt: str,
+    user_id: str,
+    page_id: Optional[int],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[str]:
+    """
+    Yield raw tracking events as CSV or NDJSON chunks.
+
+    Rows are fetched EXPORT_BATCH_SIZE at a time and written out per batch,
+    so memory stays flat however many events the export covers. Events
+    older than the raw retention horizon only exist as daily aggregates and
+    are not part of the export. A sample_weight above 1 marks a row that
+    stands for that many events of a sampled page. Short-link clicks are
+    read EXPORT_LINK_CHUNK links at a time, so they are ordered by time
+    within each chunk of links only.
+    """
+    # Short links live in the main database and their clicks in the
+    # analytics one, so codes are looked up first and added per row.
+    codes: dict[int, str] = {}
+    if kind == "short_links":
+        with SessionLocal() as db:
+            codes = dict(
+                db.execute(select(ShortLink.id, ShortLink.short_code).where(ShortLink.user_id == user_id)).all()
+            )
+
+    with AnalyticsSessionLocal() as db:
+        if kind == "short_links":
+            link_ids = sorted(codes)
+            statements = [
+                _export_statement(kind, None, link_ids[i:i + EXPORT_LINK_CHUNK], start, end)
+                for i in range(0, max(len(link_ids), 1), EXPORT_LINK_CHUNK)
+            ]
+        else:
+            statements = [_export_statement(kind, page_id, [], start, end)]
+
+        columns = list(statements[0].selected_columns.keys())
+        # Each query only runs once the previous one has been streamed.
+        rows = (batch for stmt in statements for batch in db.execute(stmt).partitions())
+        if kind == "short_links":
+            columns.insert(3, "short_code")
+            rows = (
+                [(*row[:3], codes.get(row.short_link_id), *row[3:]) for row in batch]
+                for batch in rows
+            )
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for batch in rows:
+                writer.writerows([[_serialize(v) for v in row] for row in batch])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for batch in rows:
+                yield "".join(
+                    json.dumps({c: _serialize(v) for c, v in zip(columns, row)}) + "\n"
+                    for row in batch
+                )
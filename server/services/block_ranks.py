@@ -0,0 +1,204 @@
+import os
+from typing import Optional
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from db import engine
+from models.block import Block
+from utils.periodic import PeriodicTask
+
+# Rank keys are strings over these digits. They never end in "0", so there
+# is always room for a key between any two others. A single case keeps
+# ORDER BY rank byte-wise even under case-insensitive collations.
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Width of blocks.rank; a placement that would outgrow it respreads the page.
+RANK_MAX_LENGTH = 64
+RANK_REBALANCE_LENGTH = int(os.getenv("BLOCK_RANK_REBALANCE_LENGTH", "16"))
+RANK_REBALANCE_INTERVAL = float(os.getenv("BLOCK_RANK_REBALANCE_INTERVAL", "3600"))
+
+# Display order for blocks. Rows without a rank (created before ranks
+# existed and not yet backfilled) fall back to the old sort_order/id order.
+BLOCK_ORDER = (
+    Block.rank.is_(None),
+    Block.rank,
+    Block.sort_order.is_(None),
+    Block.sort_order,
+    Block.id,
+)
+
+
+class BlockOrderError(Exception):
+    """The requested neighbors are not in display order."""
+
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    # a < b, where "" is the lowest key and None the highest
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """Return a key that sorts strictly between `before` and `after` (None = open end)."""
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"rank {before!r} must sort before {after!r}")
+    return _midpoint(before or "", after)
+
+
+def spread_ranks(count: int) -> list[str]:
+    """`count` evenly spaced keys, leaving room to insert around each one."""
+    width = 1
+    while len(DIGITS) ** width < count * 2 + 2:
+        width += 1
+
+    space = len(DIGITS) ** width
+    ranks = []
+    for i in range(count):
+        value = (i + 1) * space // (count + 1)
+        digits = ""
+        for _ in range(width):
+            value, d = divmod(value, len(DIGITS))
+            digits = DIGITS[d] + digits
+        ranks.append(digits.rstrip("0"))
+    return ranks
+
+
+# ------------------------
+# Placement (each touches only the moved block)
+# ------------------------
+
+def _ranked(page_id: int, exclude_id: Optional[int]):
+    stmt = select(Block.rank).where(Block.page_id == page_id, Block.rank.is_not(None))
+    if exclude_id is not None:
+        stmt = stmt.where(Block.id != exclude_id)
+    return stmt
+
+
+def rank_for_end(db: Session, page_id: int, exclude_id: Optional[int] = None) -> str:
+    last = db.execute(_ranked(page_id, exclude_id).order_by(Block.rank.desc()).limit(1)).scalar()
+    return rank_between(last, None)
+
+
+def rank_for_position(db: Session, page_id: int, position: int, exclude_id: Optional[int] = None) -> str:
+    """Rank that puts a block at 1-based `position` (clamped to the ends)."""
+    index = max(position, 1) - 1
+    stmt = _ranked(page_id, exclude_id).order_by(Block.rank)
+
+    if index == 0:
+        after = db.execute(stmt.limit(1)).scalar()
+        return rank_between(None, after)
+
+    neighbors = db.execute(stmt.offset(index - 1).limit(2)).scalars().all()
+    if not neighbors:
+        return rank_for_end(db, page_id, exclude_id)
+    return rank_between(neighbors[0], neighbors[1] if len(neighbors) > 1 else None)
+
+
+def rank_between_blocks(
+    db: Session,
+    page_id: int,
+    after_block_id: Optional[int],
+    before_block_id: Optional[int],
+    exclude_id: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Rank placing a block right after `after_block_id` and/or right before
+    `before_block_id`. Returns None if a referenced block is not on the page
+    and raises BlockOrderError if `after_block_id` is not shown first.
+    """
+    wanted = [i for i in (after_block_id, before_block_id) if i is not None]
+    ranks = dict(
+        db.execute(
+            select(Block.id, Block.rank).where(Block.page_id == page_id, Block.id.in_(wanted))
+        ).all()
+    )
+    if any(ranks.get(i) is None for i in wanted):
+        return None
+
+    lower = ranks.get(after_block_id)
+    upper = ranks.get(before_block_id)
+    # Equal ranks are tied on id for display; rank_between() then fails and
+    # the caller respreads the page.
+    if lower is not None and upper is not None and (lower, after_block_id) >= (upper, before_block_id):
+        raise BlockOrderError("after_block_id must be shown before before_block_id.")
+
+    if lower is not None and upper is None:
+        upper = db.execute(
+            _ranked(page_id, exclude_id).where(Block.rank > lower).order_by(Block.rank).limit(1)
+        ).scalar()
+    elif upper is not None and lower is None:
+        lower = db.execute(
+            _ranked(page_id, exclude_id).where(Block.rank < upper).order_by(Block.rank.desc()).limit(1)
+        ).scalar()
+
+    return rank_between(lower, upper)
+
+
+def block_position(db: Session, block: Block) -> int:
+    """1-based display position of a ranked block on its page."""
+    before = db.execute(
+        select(func.count(Block.id)).where(
+            Block.page_id == block.page_id,
+            or_(
+                Block.rank < block.rank,
+                (Block.rank == block.rank) & (Block.id < block.id),
+            ),
+        )
+    ).scalar()
+    return before + 1
+
+
+# ------------------------
+# Rebalancing
+# ------------------------
+
+def rebalance_page(db: Session, page_id: int):
+    """Respread every rank on the page, keeping the current display order."""
+    ids = db.execute(
+        select(Block.id).where(Block.page_id == page_id).order_by(*BLOCK_ORDER)
+    ).scalars().all()
+    if ids:
+        db.execute(
+            update(Block),
+            [{"id": id_, "rank": rank} for id_, rank in zip(ids, spread_ranks(len(ids)))],
+        )
+
+
+def rebalance_block_ranks(bind=engine, max_length: int = RANK_REBALANCE_LENGTH) -> int:
+    """
+    Backfill pages that still have unranked blocks and respread pages whose
+    keys have grown past `max_length` characters. Display order is unchanged.
+    """
+    with Session(bind) as db:
+        page_ids = db.execute(
+            select(Block.page_id)
+            .where(or_(Block.rank.is_(None), func.length(Block.rank) > max_length))
+            .distinct()
+        ).scalars().all()
+
+        for page_id in page_ids:
+            rebalance_page(db, page_id)
+            db.commit()
+
+    return len(page_ids)
+
+
+rank_rebalance_task = PeriodicTask(
+    "block-rank-rebalance",
+    RANK_REBALANCE_INTERVAL,
+    rebalance_block_ranks,
+    final_run=False,
+)
@@ -0,0 +1,84 @@
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from models.tracking_rollup import CampaignDaily
+from utils.sql import upsert_increment
+
+UTM_FIELDS = ("utm_source", "utm_medium", "utm_campaign")
+MAX_UTM_LENGTH = 255
+
+
+def parse_utm(*urls: Optional[str]) -> dict[str, Optional[str]]:
+    """
+    utm_source / utm_medium / utm_campaign from the first URL that carries
+    any of them (e.g. the landing URL, then the referrer).
+    """
+    for url in urls:
+        if not url or "utm_" not in url:
+            continue
+        try:
+            query = parse_qs(urlsplit(url).query)
+        except ValueError:
+            continue
+        values = {}
+        for field in UTM_FIELDS:
+            value = query.get(field, [""])[0].strip()[:MAX_UTM_LENGTH]
+            values[field] = value or None
+        if any(values.values()):
+            return values
+    return dict.fromkeys(UTM_FIELDS)
+
+
+def increment_campaigns(conn, events: Iterable[dict]):
+    """Add tracking events that carry UTM parameters onto the daily campaign rollup."""
+    deltas: defaultdict[tuple, list] = defaultdict(lambda: [0, 0])
+    for e in events:
+        if not any(e[field] for field in UTM_FIELDS):
+            continue
+        key = (
+            e["page_id"],
+            e["created_at"].date(),
+            e["utm_source"] or "",
+            e["utm_medium"] or "",
+            e["utm_campaign"] or "",
+        )
+        deltas[key][0 if e.get("block_id") is None else 1] += 1
+
+    upsert_increment(
+        conn,
+        CampaignDaily.__table__,
+        ["page_id", "day", "source", "medium", "campaign"],
+        [
+            {
+                "page_id": page_id,
+                "day": day,
+                "source": source,
+                "medium": medium,
+                "campaign": campaign,
+                "views": views,
+                "clicks": clicks,
+            }
+            for (page_id, day, source, medium, campaign), (views, clicks) in deltas.items()
+        ],
+    )
+
+
+def campaign_report(db: Session, page_id: int, start: date, end: date) -> list:
+    """Views and clicks per (source, medium, campaign) between `start` and `end` (inclusive)."""
+    return db.execute(
+        select(
+            CampaignDaily.source,
+            CampaignDaily.medium,
+            CampaignDaily.campaign,
+            func.sum(CampaignDaily.views).label("views"),
+            func.sum(CampaignDaily.clicks).label("clicks"),
+        )
+        .where(CampaignDaily.page_id == page_id, CampaignDaily.day >= start, CampaignDaily.day <= end)
+        .group_by(CampaignDaily.source, CampaignDaily.medium, CampaignDaily.campaign)
+        .order_by(func.sum(CampaignDaily.views).desc(), func.sum(CampaignDaily.clicks).desc())
+    ).all()
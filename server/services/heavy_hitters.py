@@ -0,0 +1,261 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, timedelta
+from typing import Iterable, Literal, Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import bindparam, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from db import analytics_engine
+from models.heavy_hitter import HeavyHitterSketch
+from utils.periodic import PeriodicTask
+from utils.sql import insert_ignore
+
+# Counters kept per sketch. An item's count is overestimated by at most
+# total / capacity, and the error reported alongside it is an exact bound.
+HEAVY_HITTER_CAPACITY = int(os.getenv("HEAVY_HITTER_CAPACITY", "100"))
+HEAVY_HITTER_PERSIST_INTERVAL = float(os.getenv("HEAVY_HITTER_PERSIST_INTERVAL", "30"))
+HEAVY_HITTER_CACHE_SIZE = int(os.getenv("HEAVY_HITTER_CACHE_SIZE", "20000"))
+# How long a persisted sketch read by this worker is trusted before other
+# workers' writes are picked up.
+HEAVY_HITTER_CACHE_TTL = float(os.getenv("HEAVY_HITTER_CACHE_TTL", "60"))
+
+Dimension = Literal["referrer", "block"]
+DIRECT = "(direct)"
+
+
+class SpaceSaving:
+    """Space-Saving top-k summary: item -> [count, max overestimate]."""
+
+    def __init__(self, capacity: int = HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self.total = 0
+        self.counts: dict[str, list[int]] = {}
+
+    def add(self, item: str, n: int = 1):
+        self.total += n
+        entry = self.counts.get(item)
+        if entry is not None:
+            entry[0] += n
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = [n, 0]
+        else:
+            # Replace the smallest counter; its count becomes the newcomer's error.
+            victim = min(self.counts, key=lambda k: self.counts[k][0])
+            floor = self.counts.pop(victim)[0]
+            self.counts[item] = [floor + n, floor]
+
+    def _floor(self) -> int:
+        # Upper bound on the count of any item not in the summary
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(c for c, _ in self.counts.values())
+
+    def merge(self, other: "SpaceSaving"):
+        floor_a, floor_b = self._floor(), other._floor()
+        merged = {}
+        for item in self.counts.keys() | other.counts.keys():
+            count_a, error_a = self.counts.get(item, (floor_a, floor_a))
+            count_b, error_b = other.counts.get(item, (floor_b, floor_b))
+            merged[item] = [count_a + count_b, error_a + error_b]
+
+        keep = sorted(merged, key=lambda k: merged[k][0], reverse=True)[: self.capacity]
+        self.counts = {item: merged[item] for item in keep}
+        self.total += other.total
+
+    def top(self, n: int) -> list[tuple[str, int, int]]:
+        """The `n` largest (item, count, error), count descending."""
+        items = sorted(self.counts.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [(item, count, error) for item, (count, error) in items]
+
+    def to_json(self) -> str:
+        return json.dumps({"total": self.total, "counts": self.counts}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: str, capacity: int = HEAVY_HITTER_CAPACITY) -> "SpaceSaving":
+        sketch = cls(capacity)
+        raw = json.loads(data)
+        sketch.total = raw["total"]
+        sketch.counts = {item: list(entry) for item, entry in raw["counts"].items()}
+        return sketch
+
+
+def referrer_host(referrer: Optional[str]) -> str:
+    if not referrer:
+        return DIRECT
+    return urlsplit(referrer).hostname or referrer[:255]
+
+
+class HeavyHitterStore:
+    """
+    Per page, per dimension, per day Space-Saving sketches.
+
+    The tracking flusher records into in-memory deltas; a periodic task
+    merges the deltas into the stored sketches. Reads merge the stored
+    sketches (cached in memory) with this worker's unsaved deltas, so
+    top-N queries rarely touch the database.
+    """
+
+    def __init__(self, bind, capacity: int, interval: float, cache_size: int, cache_ttl: float):
+        self.bind = bind
+        self.capacity = capacity
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._pending: dict[tuple, SpaceSaving] = {}
+        self._cache: "OrderedDict[tuple, tuple[float, Optional[SpaceSaving]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._task = PeriodicTask("heavy-hitter-persist", interval, self.persist)
+
+    def record(self, events: Iterable[dict]):
+        """Count referrers of views and blocks of clicks from tracking events."""
+        counts: defaultdict[tuple, defaultdict] = defaultdict(lambda: defaultdict(int))
+        for e in events:
+            day = e["created_at"].date()
+            if e.get("block_id") is None:
+                counts[(e["page_id"], "referrer", day)][referrer_host(e["referrer"])] += 1
+            else:
+                counts[(e["page_id"], "block", day)][str(e["block_id"])] += 1
+
+        with self._lock:
+            for key, items in counts.items():
+                sketch = self._pending.get(key)
+                if sketch is None:
+                    sketch = self._pending[key] = SpaceSaving(self.capacity)
+                for item, n in items.items():
+                    sketch.add(item, n)
+
+    def persist(self) -> int:
+        with self._lock:
+            if not self._pending:
+                return 0
+            pending, self._pending = self._pending, {}
+
+        table = HeavyHitterSketch.__table__
+        try:
+            with self.bind.begin() as conn:
+                empty = SpaceSaving(self.capacity).to_json()
+                insert_ignore(
+                    conn,
+                    table,
+                    [{"page_id": k[0], "dimension": k[1], "day": k[2], "data": empty} for k in pending],
+                )
+                key = tuple_(table.c.page_id, table.c.dimension, table.c.day)
+                stored = conn.execute(
+                    select(table.c.page_id, table.c.dimension, table.c.day, table.c.data)
+                    .where(key.in_(list(pending)))
+                    .with_for_update()
+                ).all()
+
+                merged = {}
+                for page_id, dimension, day, data in stored:
+                    sketch = SpaceSaving.from_json(data, self.capacity)
+                    sketch.merge(pending[(page_id, dimension, day)])
+                    merged[(page_id, dimension, day)] = sketch
+
+                conn.execute(
+                    update(table)
+                    .where(
+                        table.c.page_id == bindparam("b_page_id"),
+                        table.c.dimension == bindparam("b_dimension"),
+                        table.c.day == bindparam("b_day"),
+                    )
+                    .values(data=bindparam("data")),
+                    [
+                        {"b_page_id": k[0], "b_dimension": k[1], "b_day": k[2], "data": s.to_json()}
+                        for k, s in merged.items()
+                    ],
+                )
+        except Exception:
+            # Fold the deltas back in so the next run retries them.
+            with self._lock:
+                for key, sketch in pending.items():
+                    if key in self._pending:
+                        sketch.merge(self._pending[key])
+                    self._pending[key] = sketch
+            raise
+
+        expires = time.monotonic() + self.cache_ttl
+        with self._lock:
+            for key, sketch in merged.items():
+                self._remember(key, expires, sketch)
+        return len(pending)
+
+    def _remember(self, key: tuple, expires: float, sketch: Optional[SpaceSaving]):
+        self._cache[key] = (expires, sketch)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def top(
+        self,
+        db: Session,
+        page_id: int,
+        dimension: Dimension,
+        start: date,
+        end: date,
+        n: int,
+    ) -> tuple[list[tuple[str, int, int]], int]:
+        """
+        Top `n` (item, count, error) between `start` and `end` (inclusive)
+        and the number of events counted.
+        """
+        keys = []
+        day = start
+        while day <= end:
+            keys.append((page_id, dimension, day))
+            day += timedelta(days=1)
+
+        now = time.monotonic()
+        combined = SpaceSaving(self.capacity)
+        with self._lock:
+            missing = []
+            for key in keys:
+                entry = self._cache.get(key)
+                if entry is None or entry[0] < now:
+                    missing.append(key)
+                elif entry[1] is not None:
+                    combined.merge(entry[1])
+
+        if missing:
+            table = HeavyHitterSketch.__table__
+            rows = db.execute(
+                select(table.c.day, table.c.data).where(
+                    table.c.page_id == page_id,
+                    table.c.dimension == dimension,
+                    table.c.day.in_([k[2] for k in missing]),
+                )
+            ).all()
+            loaded = {day: SpaceSaving.from_json(data, self.capacity) for day, data in rows}
+            with self._lock:
+                for key in missing:
+                    sketch = loaded.get(key[2])
+                    self._remember(key, now + self.cache_ttl, sketch)
+                    if sketch is not None:
+                        combined.merge(sketch)
+
+        with self._lock:
+            for key in keys:
+                sketch = self._pending.get(key)
+                if sketch is not None:
+                    combined.merge(sketch)
+
+        return combined.top(n), combined.total
+
+    def start(self):
+        self._task.start()
+
+    def stop(self):
+        self._task.stop()
+
+
+heavy_hitters = HeavyHitterStore(
+    analytics_engine,
+    capacity=HEAVY_HITTER_CAPACITY,
+    interval=HEAVY_HITTER_PERSIST_INTERVAL,
+    cache_size=HEAVY_HITTER_CACHE_SIZE,
+    cache_ttl=HEAVY_HITTER_CACHE_TTL,
+)
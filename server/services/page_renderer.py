@@ -0,0 +1,163 @@
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from html import escape
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Pre-rendered profiles are written here as <slug>/index.html. Leave unset
+# to disable static rendering.
+STATIC_PAGES_DIR = os.getenv("STATIC_PAGES_DIR", "")
+
+_SAFE_SLUG = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# The page's tracking script queues views and clicks and posts them to the
+# batch endpoint with sendBeacon (a keepalive fetch where that is missing)
+# this many ms after the first one, or as soon as the page is hidden.
+TRACK_FLUSH_DELAY_MS = 2000
+
+# background, card, text, accent
+THEMES = {
+    "light": ("#f7f7fb", "#ffffff", "#1b1b2f", "#6c3ce9"),
+    "dark": ("#121212", "#1f1f1f", "#f2f2f2", "#8ab4f8"),
+    "purple-dark": ("#1a1026", "#2a1a3d", "#f3ecff", "#b388ff"),
+}
+DEFAULT_THEME = "light"
+
+_TEMPLATE = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<meta name="description" content="{description}">
+<style>
+body{{margin:0;font-family:system-ui,-apple-system,sans-serif;background:{bg};color:{text};}}
+main{{max-width:560px;margin:0 auto;padding:48px 20px;text-align:center;}}
+img.avatar{{width:96px;height:96px;border-radius:50%;object-fit:cover;}}
+h1{{font-size:1.5rem;margin:16px 0 8px;}}
+p.bio{{opacity:.8;margin:0 0 24px;}}
+a.block{{display:block;margin:12px 0;padding:14px 18px;border-radius:12px;background:{card};color:{text};text-decoration:none;border:1px solid {accent}33;}}
+a.block.primary{{background:{accent};color:#fff;}}
+</style>
+</head>
+<body>
+<main>
+{avatar}
+<h1>{title}</h1>
+{bio}
+{blocks}
+</main>
+<script>
+(function(){{
+var slug={slug_json},url="/content/public/track/batch",queue=[],timer=null;
+function flush(){{
+clearTimeout(timer);timer=null;
+if(!queue.length)return;
+var body=JSON.stringify(queue);queue=[];
+if(!(navigator.sendBeacon&&navigator.sendBeacon(url,body))){{
+fetch(url,{{method:"POST",keepalive:true,headers:{{"Content-Type":"text/plain"}},body:body}});
+}}
+}}
+function track(type,blockId){{
+queue.push({{type:type,slug:slug,block_id:blockId,landing_url:location.href,referrer:document.referrer}});
+if(!timer)timer=setTimeout(flush,{flush_ms});
+}}
+track("view");
+document.querySelectorAll("a[data-block-id]").forEach(function(a){{
+a.addEventListener("click",function(){{track("click",+a.dataset.blockId);}});
+}});
+addEventListener("pagehide",flush);
+document.addEventListener("visibilitychange",function(){{if(document.visibilityState==="hidden")flush();}});
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+def render_page_html(snapshot: dict) -> str:
+    """Render a public page snapshot (PublicPageResponse JSON) to HTML."""
+    page = snapshot["page"]
+    bg, card, text, accent = THEMES.get(page.get("theme") or DEFAULT_THEME, THEMES[DEFAULT_THEME])
+
+    blocks = "\n".join(
+        '<a class="block{primary}" href="{url}" data-block-id="{id}" rel="noopener">{label}</a>'.format(
+            primary=" primary" if block.get("is_primary") else "",
+            url=escape(block["url"]),
+            id=int(block["id"]),
+            label=escape(block["label"]),
+        )
+        for block in snapshot["blocks"]
+    )
+
+    avatar = ""
+    if page.get("avatar_url"):
+        avatar = f'<img class="avatar" src="{escape(page["avatar_url"])}" alt="">'
+
+    bio = f'<p class="bio">{escape(page["bio"])}</p>' if page.get("bio") else ""
+
+    return _TEMPLATE.format(
+        title=escape(page["title"]),
+        description=escape(page.get("bio") or page["title"]),
+        bg=bg,
+        card=card,
+        text=text,
+        accent=accent,
+        avatar=avatar,
+        bio=bio,
+        blocks=blocks,
+        # Escape "<" so a slug can never close the script tag
+        slug_json=json.dumps(page["slug"]).replace("<", "\\u003c"),
+        flush_ms=TRACK_FLUSH_DELAY_MS,
+    )
+
+
+def _page_dir(output_dir: str, slug: str) -> Optional[str]:
+    if not _SAFE_SLUG.match(slug or ""):
+        return None
+    return os.path.join(output_dir, slug)
+
+
+def write_static_page(output_dir: str, slug: str, snapshot_json: str) -> bool:
+    """Atomically (re)write <output_dir>/<slug>/index.html."""
+    page_dir = _page_dir(output_dir, slug)
+    if page_dir is None:
+        return False
+
+    html = render_page_html(json.loads(snapshot_json))
+
+    os.makedirs(page_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=page_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(html)
+    # mkstemp creates the file 0600; the web server runs as another user.
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, os.path.join(page_dir, "index.html"))
+    return True
+
+
+def remove_static_page(output_dir: str, slug: str):
+    page_dir = _page_dir(output_dir, slug)
+    if page_dir and os.path.isdir(page_dir):
+        shutil.rmtree(page_dir, ignore_errors=True)
+
+
+def publish_static_page(slug: str, snapshot_json: str, old_slug: Optional[str] = None):
+    """
+    Incrementally re-render one page after it changed. Failures are logged
+    rather than raised: the API response must not depend on the disk.
+    """
+    if not STATIC_PAGES_DIR:
+        return
+
+    try:
+        if old_slug and old_slug != slug:
+            remove_static_page(STATIC_PAGES_DIR, old_slug)
+        write_static_page(STATIC_PAGES_DIR, slug, snapshot_json)
+    except Exception:
+        logger.exception("Static render failed for page %s", slug)
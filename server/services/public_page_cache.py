@@ -0,0 +1,82 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+PUBLIC_PAGE_CACHE_SIZE = int(os.getenv("PUBLIC_PAGE_CACHE_SIZE", "10000"))
+# How long an entry is served before its version is checked against the
+# database again; bounds how long other workers' edits can go unseen.
+PUBLIC_PAGE_CACHE_TTL = float(os.getenv("PUBLIC_PAGE_CACHE_TTL", "5"))
+
+
+class CachedPage:
+    __slots__ = ("page_id", "version", "body", "etag", "checked_at")
+
+    def __init__(self, page_id: int, version: int, body: bytes):
+        self.page_id = page_id
+        self.version = version
+        self.body = body
+        # Strong validator derived from the bytes themselves, so it stays
+        # correct across restarts and workers.
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.checked_at = time.monotonic()
+
+
+class PublicPageCache:
+    """
+    Serialized PublicPageResponse bytes keyed by slug.
+
+    Entries carry the page's `version` column as read together with its
+    snapshot. Writers in this process bump the page after committing, which
+    drops older entries at once; edits made by other workers are noticed
+    when an entry older than `ttl` is checked against the database.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, slug: str) -> Optional[CachedPage]:
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is None:
+                return None
+            if self._versions.get(entry.page_id, 0) > entry.version:
+                del self._entries[slug]
+                return None
+            self._entries.move_to_end(slug)
+            return entry
+
+    def needs_check(self, entry: CachedPage) -> bool:
+        return time.monotonic() - entry.checked_at >= self.ttl
+
+    def checked(self, entry: CachedPage):
+        """The entry's version still matches the database."""
+        entry.checked_at = time.monotonic()
+
+    def set(self, slug: str, entry: CachedPage):
+        with self._lock:
+            if self._versions.get(entry.page_id, 0) > entry.version:
+                return
+            self._entries[slug] = entry
+            self._entries.move_to_end(slug)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def bump(self, page_id: int, version: int, *slugs: str):
+        """
+        Invalidate a page after a committed write that left it at `version`;
+        pass every slug it was served under.
+        """
+        with self._lock:
+            self._versions[page_id] = max(self._versions.get(page_id, 0), version)
+            for slug in slugs:
+                self._entries.pop(slug, None)
+
+
+public_page_cache = PublicPageCache(PUBLIC_PAGE_CACHE_SIZE, PUBLIC_PAGE_CACHE_TTL)
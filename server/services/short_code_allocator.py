@@ -0,0 +1,164 @@
+import hashlib
+import math
+import os
+import random
+import string
+import threading
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from models.short_link import ShortLink
+
+SHORT_CODE_FILTER_CAPACITY = int(os.getenv("SHORT_CODE_FILTER_CAPACITY", "1000000"))
+SHORT_CODE_FILTER_FP_RATE = float(os.getenv("SHORT_CODE_FILTER_FP_RATE", "0.01"))
+
+# How many suffixed alternatives are checked alongside the preferred code
+# in the same query. Popular slugs usually need one of these.
+SHORT_CODE_CANDIDATES = 8
+SHORT_CODE_MAX_ATTEMPTS = 5
+# Random suffixes drawn per base before settling for fewer alternatives;
+# only reached when the filter is saturated.
+SHORT_CODE_MAX_DRAWS = 200
+
+
+class ShortCodeAllocationError(Exception):
+    pass
+
+
+def _random_suffix(length: int = 4) -> str:
+    return "".join(random.choices(string.ascii_lowercase + string.digits, k=length))
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings. `might_contain` never returns a
+    false negative; false positives only make the allocator skip a random
+    alternative that was actually free.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.size = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: str):
+        for pos in self._positions(value):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, value: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class ShortCodeAllocator:
+    """
+    Picks unused short codes with one database round trip.
+
+    The preferred code is always checked against the database, so a false
+    positive never costs a custom slug its exact name. A Bloom filter of
+    every code this process has seen (warmed at startup, fed by inserts)
+    only prunes the random alternatives checked alongside it in the same
+    IN query. Other workers can
+    still insert the same code in between, so callers insert optimistically
+    and retry on IntegrityError instead of holding a lock.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self._filter = BloomFilter(capacity, fp_rate)
+        self._lock = threading.Lock()
+
+    def warm(self, db: Session):
+        # Leave room for growth so the filter does not saturate as links
+        # are added after startup.
+        existing = db.execute(select(func.count(ShortLink.id))).scalar()
+        fresh = BloomFilter(max(self.capacity, existing * 2), self.fp_rate)
+        codes = db.execute(
+            select(ShortLink.short_code).execution_options(yield_per=5000)
+        ).scalars()
+        for code in codes:
+            fresh.add(code)
+
+        with self._lock:
+            self._filter = fresh
+
+    def add(self, code: str):
+        with self._lock:
+            self._filter.add(code)
+
+    def record_conflicts(self, db: Session, codes: list[str]) -> set[str]:
+        """
+        After an IntegrityError (and rollback): remember which of `codes`
+        another writer took, so only those are skipped from now on.
+        """
+        taken = set(
+            db.execute(select(ShortLink.short_code).where(ShortLink.short_code.in_(codes))).scalars()
+        )
+        for code in taken:
+            self.add(code)
+        return taken
+
+    def _candidates(self, base: str) -> list[str]:
+        candidates = [base]
+        with self._lock:
+            for _ in range(SHORT_CODE_MAX_DRAWS):
+                if len(candidates) > SHORT_CODE_CANDIDATES:
+                    break
+                candidate = f"{base}-{_random_suffix(4)}"
+                if not self._filter.might_contain(candidate):
+                    candidates.append(candidate)
+        return candidates
+
+    def allocate(self, db: Session, bases: list[str]) -> list[str]:
+        """Return one free code per entry of `bases`, in order."""
+        result: list[str | None] = [None] * len(bases)
+        taken: set[str] = set()
+
+        for _ in range(SHORT_CODE_MAX_ATTEMPTS):
+            pending = [i for i, code in enumerate(result) if code is None]
+            if not pending:
+                break
+
+            candidates = {i: self._candidates(bases[i]) for i in pending}
+            all_candidates = {c for cands in candidates.values() for c in cands}
+            existing = set(
+                db.execute(
+                    select(ShortLink.short_code).where(ShortLink.short_code.in_(all_candidates))
+                ).scalars()
+            )
+
+            for code in existing:
+                self.add(code)
+
+            for i in pending:
+                for candidate in candidates[i]:
+                    if candidate not in existing and candidate not in taken:
+                        result[i] = candidate
+                        taken.add(candidate)
+                        break
+
+        if any(code is None for code in result):
+            raise ShortCodeAllocationError("Could not allocate a unique short code.")
+
+        return result
+
+
+short_code_allocator = ShortCodeAllocator(
+    capacity=SHORT_CODE_FILTER_CAPACITY,
+    fp_rate=SHORT_CODE_FILTER_FP_RATE,
+)
+
+
+def _remember_code(mapper, connection, target: ShortLink):
+    short_code_allocator.add(target.short_code)
+
+
+event.listen(ShortLink, "after_insert", _remember_code)
+event.listen(ShortLink, "after_update", _remember_code)
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+
+from models.short_link import ShortLink
+
+SHORT_LINK_CACHE_SIZE = int(os.getenv("SHORT_LINK_CACHE_SIZE", "50000"))
+SHORT_LINK_CACHE_TTL = float(os.getenv("SHORT_LINK_CACHE_TTL", "300"))
+SHORT_LINK_CACHE_NEGATIVE_TTL = float(os.getenv("SHORT_LINK_CACHE_NEGATIVE_TTL", "30"))
+
+# Returned by ShortLinkCache.get when the database has to be consulted.
+CACHE_MISS = object()
+
+
+class ShortLinkCache:
+    """
+    Bounded LRU + TTL cache mapping short_code -> (link_id, original_url).
+
+    Unknown codes are cached as misses for a shorter TTL so a flood of bad
+    codes does not hit the database either.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, short_code: str):
+        """
+        Return (link_id, original_url), None for a cached unknown code,
+        or CACHE_MISS when the database has to be consulted.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(short_code)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[short_code]
+                self.misses += 1
+                return CACHE_MISS
+
+            self._entries.move_to_end(short_code)
+            if entry[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return entry[1]
+
+    def set(self, short_code: str, value: Optional[tuple[int, str]]):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        with self._lock:
+            self._entries[short_code] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(short_code)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, short_code: str):
+        with self._lock:
+            if self._entries.pop(short_code, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+short_link_cache = ShortLinkCache(
+    maxsize=SHORT_LINK_CACHE_SIZE,
+    ttl=SHORT_LINK_CACHE_TTL,
+    negative_ttl=SHORT_LINK_CACHE_NEGATIVE_TTL,
+)
+
+
+def resolve_short_code(db, short_code: str) -> Optional[tuple[int, str]]:
+    """
+    Resolve a short code to (link_id, original_url), going to the database
+    only on a cache miss.
+    """
+    cached = short_link_cache.get(short_code)
+    if cached is not CACHE_MISS:
+        return cached
+
+    row = (
+        db.query(ShortLink.id, ShortLink.original_url)
+        .filter(ShortLink.short_code == short_code)
+        .first()
+    )
+    value = (row.id, row.original_url) if row else None
+    short_link_cache.set(short_code, value)
+    return value
+
+
+# ------------------------
+# Invalidation
+# ------------------------
+# Codes touched by a flush are collected on the session and dropped from
+# the cache only once the transaction commits: dropping them at flush time
+# would let a lookup before the commit cache the old row again, and a
+# rollback has nothing to invalidate.
+
+_PENDING_KEY = "short_link_codes"
+
+
+def _collect_link(mapper, connection, target: ShortLink):
+    session = object_session(target)
+    if session is None:
+        return
+    codes = session.info.setdefault(_PENDING_KEY, set())
+    codes.add(target.short_code)
+
+    # If the code itself was edited, the old code must go too.
+    codes.update(get_history(target, "short_code").deleted or ())
+
+
+def _invalidate_committed(session: Session):
+    for code in session.info.pop(_PENDING_KEY, ()):
+        short_link_cache.invalidate(code)
+
+
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(ShortLink, "after_insert", _collect_link)
+event.listen(ShortLink, "after_update", _collect_link)
+event.listen(ShortLink, "after_delete", _collect_link)
+event.listen(Session, "after_commit", _invalidate_committed)
+event.listen(Session, "after_rollback", _discard_pending)
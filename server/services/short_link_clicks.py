@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from db import analytics_engine, engine
+from models.short_link_click import ShortLinkClickEvent, ShortLinkClickHourly, ShortLinkClickDaily
+from utils.periodic import PeriodicTask
+from utils.sql import upsert_increment
+
+# Clamp the flush interval so a bad env value can neither hammer the
+# database nor hold clicks in memory for minutes.
+SHORT_LINK_CLICK_FLUSH_INTERVAL = min(
+    max(float(os.getenv("SHORT_LINK_CLICK_FLUSH_INTERVAL", "2")), 0.1),
+    60.0,
+)
+SHORT_LINK_CLICK_MAX_PENDING = int(os.getenv("SHORT_LINK_CLICK_MAX_PENDING", "10000"))
+# Hard cap on buffered click events. If the analytics database is slow or
+# locked, clicks beyond it are dropped (and counted) instead of growing
+# memory without limit; redirects still succeed.
+SHORT_LINK_CLICK_MAX_BUFFER = int(os.getenv("SHORT_LINK_CLICK_MAX_BUFFER", "100000"))
+
+_INCREMENT_SQL = text(
+    "UPDATE short_links SET click_count = click_count + :delta WHERE id = :id"
+)
+
+
+class ClickAggregator:
+    """
+    Write-behind click recorder for short links.
+
+    Redirects only append to in-memory buffers. A background task
+    periodically writes the raw click events and the hourly and daily
+    rollup increments to the analytics database in one transaction, then
+    applies a set-based `click_count = click_count + :delta` update to the
+    short links in the main database, so concurrent workers never
+    overwrite each other's increments. At most `max_size` events are
+    buffered; further clicks are dropped and counted.
+    """
+
+    def __init__(self, bind, links_bind, interval: float, max_pending: int, max_size: int):
+        self.bind = bind
+        self.links_bind = links_bind
+        self.max_pending = max_pending
+        self.max_size = max_size
+        self.dropped = 0
+        self._events: list[dict] = []
+        # click_count deltas whose events are written but which have not
+        # yet been applied to short_links
+        self._deltas: defaultdict[int, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._task = PeriodicTask("short-link-click-flush", interval, self.flush)
+
+    def record(
+        self,
+        link_id: int,
+        referrer: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ):
+        event = {
+            "short_link_id": link_id,
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            "referrer": referrer,
+            "user_agent": user_agent,
+        }
+        with self._lock:
+            if len(self._events) >= self.max_size:
+                self.dropped += 1
+                return
+            self._events.append(event)
+            pending = len(self._events)
+
+        if pending >= self.max_pending:
+            self._task.wake()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    def flush(self) -> int:
+        with self._lock:
+            if not self._events and not self._deltas:
+                return 0
+            events, self._events = self._events, []
+
+        deltas: defaultdict[int, int] = defaultdict(int)
+        hourly: defaultdict[tuple, int] = defaultdict(int)
+        daily: defaultdict[tuple, int] = defaultdict(int)
+        for ev in events:
+            link_id, ts = ev["short_link_id"], ev["created_at"]
+            deltas[link_id] += 1
+            hourly[(link_id, ts.replace(minute=0, second=0, microsecond=0))] += 1
+            daily[(link_id, ts.date())] += 1
+
+        if events:
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(ShortLinkClickEvent.__table__.insert(), events)
+                    upsert_increment(
+                        conn,
+                        ShortLinkClickHourly.__table__,
+                        ["short_link_id", "bucket_start"],
+                        [{"short_link_id": k[0], "bucket_start": k[1], "clicks": n} for k, n in hourly.items()],
+                    )
+                    upsert_increment(
+                        conn,
+                        ShortLinkClickDaily.__table__,
+                        ["short_link_id", "day"],
+                        [{"short_link_id": k[0], "day": k[1], "clicks": n} for k, n in daily.items()],
+                    )
+            except Exception:
+                # Put the events back so the next flush retries them, keeping
+                # the oldest ones if that overflows the buffer.
+                with self._lock:
+                    self._events[:0] = events
+                    overflow = len(self._events) - self.max_size
+                    if overflow > 0:
+                        del self._events[-overflow:]
+                        self.dropped += overflow
+                raise
+
+        with self._lock:
+            for link_id, delta in deltas.items():
+                self._deltas[link_id] += delta
+            deltas, self._deltas = self._deltas, defaultdict(int)
+
+        try:
+            with self.links_bind.begin() as conn:
+                conn.execute(
+                    _INCREMENT_SQL,
+                    [{"id": link_id, "delta": delta} for link_id, delta in deltas.items()],
+                )
+        except Exception:
+            # The events are already stored; only retry the counts.
+            with self._lock:
+                for link_id, delta in deltas.items():
+                    self._deltas[link_id] += delta
+            raise
+
+        return len(events)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._events),
+                "max_size": self.max_size,
+                "pending_links": len(self._deltas),
+                "dropped": self.dropped,
+            }
+
+    def start(self):
+        self._task.start()
+
+    def stop(self):
+        self._task.stop()
+
+
+click_aggregator = ClickAggregator(
+    analytics_engine,
+    engine,
+    interval=SHORT_LINK_CLICK_FLUSH_INTERVAL,
+    max_pending=SHORT_LINK_CLICK_MAX_PENDING,
+    max_size=SHORT_LINK_CLICK_MAX_BUFFER,
+)
@@ -0,0 +1,111 @@
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, text
+
+from db import analytics_engine
+from models.page import PageView, LinkClick
+from models.tracking_rollup import PageViewDaily, LinkClickDaily
+from utils.periodic import PeriodicTask
+from utils.sql import upsert_increment
+
+logger = logging.getLogger(__name__)
+
+TRACKING_RAW_RETENTION_DAYS = int(os.getenv("TRACKING_RAW_RETENTION_DAYS", "90"))
+TRACKING_COMPACTION_CHUNK = int(os.getenv("TRACKING_COMPACTION_CHUNK", "5000"))
+TRACKING_COMPACTION_INTERVAL = float(os.getenv("TRACKING_COMPACTION_INTERVAL", "3600"))
+TRACKING_VACUUM_PAGES = int(os.getenv("TRACKING_VACUUM_PAGES", "2000"))
+
+
+def raw_retention_cutoff(horizon_days: int = TRACKING_RAW_RETENTION_DAYS) -> datetime:
+    """
+    Start of the oldest UTC day still kept as raw events. Everything before
+    it lives in the daily aggregate tables, so readers can add the two
+    without double counting.
+    """
+    today = datetime.now(timezone.utc).date()
+    day = today - timedelta(days=horizon_days)
+    return datetime(day.year, day.month, day.day)
+
+
+def _compact_chunk(conn, cutoff: datetime, chunk_size: int, model, rollup, key_columns: list[str]) -> int:
+    group_columns = [getattr(model, c) for c in key_columns if c != "day"]
+    rows = conn.execute(
+        select(model.id, model.created_at, model.sample_weight, *group_columns)
+        .where(model.created_at < cutoff)
+        .order_by(model.id)
+        .limit(chunk_size)
+    ).all()
+    if not rows:
+        return 0
+
+    counts: defaultdict[tuple, int] = defaultdict(int)
+    for row in rows:
+        counts[tuple(row[3:]) + (row.created_at.date(),)] += row.sample_weight
+
+    counter = "views" if rollup is PageViewDaily else "clicks"
+    upsert_increment(
+        conn,
+        rollup.__table__,
+        key_columns,
+        [{**dict(zip(key_columns, key)), counter: n} for key, n in counts.items()],
+    )
+    conn.execute(delete(model).where(model.id.in_([row.id for row in rows])))
+    return len(rows)
+
+
+def _incremental_vacuum(bind, pages: int):
+    if bind.dialect.name != "sqlite":
+        return  # Postgres autovacuum takes care of this
+
+    with bind.connect() as conn:
+        mode = conn.execute(text("PRAGMA auto_vacuum")).scalar()
+        if mode != 2:
+            logger.info("SQLite auto_vacuum is not INCREMENTAL; run VACUUM once to enable reclaiming space.")
+            return
+        conn.execute(text(f"PRAGMA incremental_vacuum({int(pages)})"))
+        conn.commit()
+
+
+def compact_tracking_events(
+    bind=analytics_engine,
+    horizon_days: int = TRACKING_RAW_RETENTION_DAYS,
+    chunk_size: int = TRACKING_COMPACTION_CHUNK,
+) -> dict:
+    """
+    Roll raw page views / link clicks older than the horizon into daily
+    aggregates and delete them.
+
+    Each chunk is aggregated, upserted and deleted in its own short
+    transaction, so tracking writers only ever wait for one chunk.
+    """
+    cutoff = raw_retention_cutoff(horizon_days)
+    compacted = {}
+
+    for name, model, rollup, keys in (
+        ("page_views", PageView, PageViewDaily, ["page_id", "day"]),
+        ("link_clicks", LinkClick, LinkClickDaily, ["page_id", "block_id", "day"]),
+    ):
+        total = 0
+        while True:
+            with bind.begin() as conn:
+                n = _compact_chunk(conn, cutoff, chunk_size, model, rollup, keys)
+            total += n
+            if n < chunk_size:
+                break
+        compacted[name] = total
+
+    if any(compacted.values()):
+        _incremental_vacuum(bind, TRACKING_VACUUM_PAGES)
+
+    return compacted
+
+
+compaction_task = PeriodicTask(
+    "tracking-compaction",
+    TRACKING_COMPACTION_INTERVAL,
+    compact_tracking_events,
+    final_run=False,
+)
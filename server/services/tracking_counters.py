@@ -0,0 +1,139 @@
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from db import analytics_engine, engine
+from models.analytics_meta import AnalyticsMeta
+from models.page import Page, PageView, LinkClick
+from models.tracking_rollup import PageViewDaily, LinkClickDaily, TrackingCounter
+from utils.sql import insert_ignore, upsert_increment
+
+PAGE_TOTAL = 0  # block_id of the per-page row
+COUNTERS_BACKFILLED = "tracking_counters_backfilled"  # AnalyticsMeta key
+
+
+def increment_counters(conn, events: Iterable[dict]):
+    """Add tracking events (page_id, block_id) onto the counters."""
+    deltas: defaultdict[tuple, list] = defaultdict(lambda: [0, 0])
+    for e in events:
+        if e.get("block_id") is None:
+            deltas[(e["page_id"], PAGE_TOTAL)][0] += 1
+        else:
+            deltas[(e["page_id"], PAGE_TOTAL)][1] += 1
+            deltas[(e["page_id"], e["block_id"])][1] += 1
+
+    upsert_increment(
+        conn,
+        TrackingCounter.__table__,
+        ["page_id", "block_id"],
+        [
+            {"page_id": page_id, "block_id": block_id, "views": views, "clicks": clicks}
+            for (page_id, block_id), (views, clicks) in deltas.items()
+        ],
+    )
+
+
+def page_counters(db: Session, page_id: int, block_id: Optional[int] = None) -> tuple[int, int]:
+    """(views, clicks) for a page, or (0, clicks) for one of its blocks."""
+    row = db.execute(
+        select(TrackingCounter.views, TrackingCounter.clicks).where(
+            TrackingCounter.page_id == page_id,
+            TrackingCounter.block_id == (block_id or PAGE_TOTAL),
+        )
+    ).first()
+    return (row.views, row.clicks) if row else (0, 0)
+
+
+# ------------------------
+# Reconciliation
+# ------------------------
+
+def recount_page(conn, page_id: int) -> dict[int, tuple[int, int]]:
+    """Exact counters for one page from raw events plus compacted rollups."""
+    views = conn.execute(
+        select(func.coalesce(func.sum(PageView.sample_weight), 0)).where(PageView.page_id == page_id)
+    ).scalar() + conn.execute(
+        select(func.coalesce(func.sum(PageViewDaily.views), 0)).where(PageViewDaily.page_id == page_id)
+    ).scalar()
+
+    clicks: defaultdict[int, int] = defaultdict(int)
+    for block_id, n in conn.execute(
+        select(LinkClick.block_id, func.sum(LinkClick.sample_weight))
+        .where(LinkClick.page_id == page_id)
+        .group_by(LinkClick.block_id)
+    ):
+        clicks[block_id] += n
+    for block_id, n in conn.execute(
+        select(LinkClickDaily.block_id, func.sum(LinkClickDaily.clicks))
+        .where(LinkClickDaily.page_id == page_id)
+        .group_by(LinkClickDaily.block_id)
+    ):
+        clicks[block_id] += n
+
+    counts = {block_id: (0, n) for block_id, n in clicks.items() if block_id is not None}
+    if views or clicks:
+        counts[PAGE_TOTAL] = (views, sum(clicks.values()))
+    return counts
+
+
+def reconcile_counters(
+    bind=analytics_engine,
+    page_ids: Optional[list[int]] = None,
+    pages_bind=engine,
+) -> dict[int, dict]:
+    """
+    Recompute the counters of the given pages (default: all) and return
+    {page_id: {block_id: (stored, recounted)}} for every row that was off.
+    Each page is rewritten in its own transaction, clearing its rows before
+    counting so increments from concurrent ingestion are not lost.
+    """
+    if page_ids is None:
+        with pages_bind.connect() as conn:
+            page_ids = conn.execute(select(Page.id)).scalars().all()
+
+    drift: dict[int, dict] = {}
+    for page_id in page_ids:
+        with bind.begin() as conn:
+            stored = {
+                row.block_id: (row.views, row.clicks)
+                for row in conn.execute(
+                    select(TrackingCounter).where(TrackingCounter.page_id == page_id)
+                )
+            }
+            conn.execute(delete(TrackingCounter).where(TrackingCounter.page_id == page_id))
+            counts = recount_page(conn, page_id)
+            if counts:
+                conn.execute(
+                    TrackingCounter.__table__.insert(),
+                    [
+                        {"page_id": page_id, "block_id": block_id, "views": views, "clicks": clicks}
+                        for block_id, (views, clicks) in counts.items()
+                    ],
+                )
+
+        off = {
+            block_id: (stored.get(block_id, (0, 0)), counts.get(block_id, (0, 0)))
+            for block_id in stored.keys() | counts.keys()
+            if stored.get(block_id, (0, 0)) != counts.get(block_id, (0, 0))
+        }
+        if off:
+            drift[page_id] = off
+
+    return drift
+
+
+def backfill_counters(bind=analytics_engine, pages_bind=engine) -> int:
+    """Fill the counters table once, on the first start after it was introduced."""
+    with bind.connect() as conn:
+        done = conn.execute(
+            select(AnalyticsMeta.key).where(AnalyticsMeta.key == COUNTERS_BACKFILLED)
+        ).first()
+    if done is not None:
+        return 0
+
+    drift = reconcile_counters(bind, pages_bind=pages_bind)
+    with bind.begin() as conn:
+        insert_ignore(conn, AnalyticsMeta.__table__, [{"key": COUNTERS_BACKFILLED}])
+    return len(drift)
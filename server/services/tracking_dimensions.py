@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+
+from models.tracking_dimension import UserAgent, Referrer
+from utils.sql import insert_ignore
+
+TRACKING_DIMENSION_CACHE_SIZE = int(os.getenv("TRACKING_DIMENSION_CACHE_SIZE", "20000"))
+MAX_DIMENSION_LENGTH = 1024
+
+
+class DimensionCache:
+    """
+    Interns repetitive strings (user agents, referrers) into a dimension
+    table and remembers string -> id in a bounded in-process LRU, so event
+    rows only store a small integer and ingestion rarely queries for it.
+    """
+
+    def __init__(self, model, maxsize: int):
+        self.model = model
+        self.maxsize = maxsize
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, value: str, id_: int):
+        self._ids[value] = id_
+        self._ids.move_to_end(value)
+        while len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+    def intern_many(self, conn, values: Iterable[Optional[str]]) -> dict[str, int]:
+        """
+        Map each non-empty value (truncated to MAX_DIMENSION_LENGTH) to its
+        id, inserting unseen values. Works with a Session or Connection.
+        """
+        wanted = {v[:MAX_DIMENSION_LENGTH] for v in values if v}
+        found: dict[str, int] = {}
+
+        with self._lock:
+            for value in wanted:
+                id_ = self._ids.get(value)
+                if id_ is not None:
+                    self._ids.move_to_end(value)
+                    found[value] = id_
+
+        missing = wanted - found.keys()
+        if missing:
+            table = self.model.__table__
+            insert_ignore(conn, table, [{"value": v} for v in missing])
+            rows = conn.execute(
+                select(table.c.value, table.c.id).where(table.c.value.in_(missing))
+            ).all()
+            with self._lock:
+                for value, id_ in rows:
+                    self._remember(value, id_)
+                    found[value] = id_
+
+        return found
+
+    def intern(self, conn, value: Optional[str]) -> Optional[int]:
+        if not value:
+            return None
+        return self.intern_many(conn, [value]).get(value[:MAX_DIMENSION_LENGTH])
+
+
+user_agent_dimension = DimensionCache(UserAgent, TRACKING_DIMENSION_CACHE_SIZE)
+referrer_dimension = DimensionCache(Referrer, TRACKING_DIMENSION_CACHE_SIZE)
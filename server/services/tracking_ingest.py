@@ -0,0 +1,371 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db import analytics_engine, engine
+from models.block import Block
+from models.page import Page, PageView, LinkClick
+from services.tracking_dimensions import (
+    MAX_DIMENSION_LENGTH,
+    referrer_dimension,
+    user_agent_dimension,
+)
+from services.campaigns import UTM_FIELDS, increment_campaigns, parse_utm
+from services.heavy_hitters import heavy_hitters
+from services.tracking_counters import increment_counters
+from services.tracking_sampling import tracking_sampler
+from services.unique_visitors import record_unique_visitors
+from utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+TRACKING_QUEUE_SIZE = int(os.getenv("TRACKING_QUEUE_SIZE", "50000"))
+TRACKING_FLUSH_BATCH = int(os.getenv("TRACKING_FLUSH_BATCH", "2000"))
+TRACKING_FLUSH_INTERVAL = min(
+    max(float(os.getenv("TRACKING_FLUSH_INTERVAL", "1")), 0.1),
+    60.0,
+)
+# How long a request may wait for room in a full queue before its events
+# are dropped.
+TRACKING_ENQUEUE_TIMEOUT = float(os.getenv("TRACKING_ENQUEUE_TIMEOUT", "0.05"))
+# Failed writes of the same batch before it is dropped, so one bad event
+# cannot stall the queue.
+TRACKING_FLUSH_MAX_RETRIES = int(os.getenv("TRACKING_FLUSH_MAX_RETRIES", "5"))
+TRACKING_TARGET_CACHE_SIZE = int(os.getenv("TRACKING_TARGET_CACHE_SIZE", "10000"))
+TRACKING_TARGET_CACHE_TTL = float(os.getenv("TRACKING_TARGET_CACHE_TTL", "60"))
+# A cached slug that misses (unknown page or block) is looked up again if
+# it was loaded longer ago than this, to see writes from other workers.
+TRACKING_TARGET_RECHECK = float(os.getenv("TRACKING_TARGET_RECHECK", "1"))
+
+
+def tracking_event(
+    page_id: int,
+    block_id: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    referrer: Optional[str] = None,
+    landing_url: Optional[str] = None,
+) -> dict:
+    """
+    A page view (block_id None) or link click, stamped with the current UTC
+    time. UTM parameters are taken from the landing URL, else the referrer.
+    """
+    return {
+        "page_id": page_id,
+        "block_id": block_id,
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "referrer": referrer,
+        **parse_utm(landing_url, referrer),
+    }
+
+
+class TrackingQueue:
+    """
+    Bounded in-process buffer between the tracking endpoints and the
+    database.
+
+    Requests append lists of events, each kept together as one unit; a
+    background task drains units in batches of about `batch_size` events,
+    interning user agents/referrers once per batch, writing each table
+    with a single executemany insert and folding the batch into the
+    counters, unique-visitor sketches, campaign rollups and top-N
+    summaries. When the queue is full a request waits up to
+    `enqueue_timeout` for the flusher to make room, then its events are
+    dropped and counted. A batch whose write fails is retried by later
+    flushes, up to `max_retries` times, then dropped and counted.
+    """
+
+    def __init__(
+        self,
+        bind,
+        pages_bind,
+        maxsize: int,
+        batch_size: int,
+        interval: float,
+        enqueue_timeout: float,
+        max_retries: int,
+    ):
+        self.bind = bind
+        self.pages_bind = pages_bind
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self._failures = 0
+        self._units: deque[list[dict]] = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._task = PeriodicTask("tracking-flush", interval, self.flush)
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.discarded = 0
+        self.failed = 0
+        self.waits = 0
+
+    def submit(self, events: list[dict]) -> bool:
+        """
+        Enqueue `events` as one unit: either all of them are accepted or,
+        if the queue stays full, all are dropped and False is returned.
+        """
+        if not events:
+            return True
+
+        def has_room():
+            return self._size + len(events) <= self.maxsize
+
+        with self._cond:
+            if not has_room():
+                self.waits += 1
+                self._task.wake()
+                if not self._cond.wait_for(has_room, self.enqueue_timeout):
+                    self.dropped += len(events)
+                    return False
+
+            self._units.append(events)
+            self._size += len(events)
+            self.enqueued += len(events)
+            pending = self._size
+
+        if pending >= self.batch_size:
+            self._task.wake()
+        return True
+
+    def pending(self) -> int:
+        with self._cond:
+            return self._size
+
+    def flush(self) -> int:
+        """
+        Write everything queued so far, one batch per transaction. Units
+        are never split, so each submit() lands in a single transaction.
+        """
+        total = 0
+        while True:
+            with self._cond:
+                if not self._units:
+                    break
+                units = []
+                batch: list[dict] = []
+                while self._units and (not batch or len(batch) + len(self._units[0]) <= self.batch_size):
+                    unit = self._units.popleft()
+                    units.append(unit)
+                    batch.extend(unit)
+                self._size -= len(batch)
+                self._cond.notify_all()
+
+            try:
+                self._write(batch)
+            except Exception:
+                with self._cond:
+                    self._failures += 1
+                    if self._failures < self.max_retries:
+                        # Put the units back so the next flush retries them.
+                        self._units.extendleft(reversed(units))
+                        self._size += len(batch)
+                        raise
+                    self._failures = 0
+                    self.failed += len(batch)
+                logger.exception(
+                    "Dropping %d tracking events after %d failed writes", len(batch), self.max_retries
+                )
+                continue
+
+            with self._cond:
+                self._failures = 0
+            total += len(batch)
+        return total
+
+    def _write(self, batch: list[dict]):
+        # Events are validated against a cache, so a page or block can have
+        # been deleted since; skip those instead of storing orphans.
+        with self.pages_bind.connect() as conn:
+            page_ids = {e["page_id"] for e in batch}
+            live_pages = set(conn.execute(select(Page.id).where(Page.id.in_(page_ids))).scalars())
+            block_ids = {e["block_id"] for e in batch if e["block_id"] is not None}
+            live_blocks = set()
+            if block_ids:
+                live_blocks = set(
+                    conn.execute(
+                        select(Block.page_id, Block.id).where(Block.id.in_(block_ids))
+                    ).all()
+                )
+
+        # Dimensions get their own transaction so the ids cached by
+        # DimensionCache never refer to rolled-back rows.
+        with self.bind.begin() as conn:
+            ua_ids = user_agent_dimension.intern_many(conn, (e["user_agent"] for e in batch))
+            ref_ids = referrer_dimension.intern_many(conn, (e["referrer"] for e in batch))
+
+        with self.bind.begin() as conn:
+            views, clicks, accepted = [], [], []
+            discarded = 0
+            for e in batch:
+                row = {
+                    "page_id": e["page_id"],
+                    "created_at": e["created_at"],
+                    "ip_address": e["ip_address"],
+                    "user_agent_id": ua_ids.get((e["user_agent"] or "")[:MAX_DIMENSION_LENGTH]),
+                    "referrer_id": ref_ids.get((e["referrer"] or "")[:MAX_DIMENSION_LENGTH]),
+                    **{field: e[field] for field in UTM_FIELDS},
+                }
+                if e["block_id"] is None:
+                    if e["page_id"] in live_pages:
+                        views.append(row)
+                        accepted.append(e)
+                        continue
+                elif (e["page_id"], e["block_id"]) in live_blocks:
+                    row["block_id"] = e["block_id"]
+                    clicks.append(row)
+                    accepted.append(e)
+                    continue
+                discarded += 1
+
+            # Busy pages only store a weighted sample of raw rows; counters
+            # and sketches below still see every event.
+            views = tracking_sampler.sample(views)
+            clicks = tracking_sampler.sample(clicks)
+            if views:
+                conn.execute(PageView.__table__.insert(), views)
+            if clicks:
+                conn.execute(LinkClick.__table__.insert(), clicks)
+            increment_counters(conn, accepted)
+            record_unique_visitors(conn, accepted)
+            increment_campaigns(conn, accepted)
+
+        with self._cond:
+            self.written += len(accepted)
+            self.discarded += discarded
+        # In memory only, so it runs once the events are safely committed
+        heavy_hitters.record(accepted)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": self._size,
+                "maxsize": self.maxsize,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "discarded": self.discarded,
+                "failed": self.failed,
+                "waits": self.waits,
+            }
+
+    def start(self):
+        self._task.start()
+
+    def stop(self):
+        # The final run drains whatever is still queued.
+        self._task.stop()
+
+
+tracking_queue = TrackingQueue(
+    analytics_engine,
+    engine,
+    maxsize=TRACKING_QUEUE_SIZE,
+    batch_size=TRACKING_FLUSH_BATCH,
+    interval=TRACKING_FLUSH_INTERVAL,
+    enqueue_timeout=TRACKING_ENQUEUE_TIMEOUT,
+    max_retries=TRACKING_FLUSH_MAX_RETRIES,
+)
+
+
+# ------------------------
+# Slug lookups
+# ------------------------
+
+class TrackingTarget:
+    __slots__ = ("page_id", "block_ids")
+
+    def __init__(self, page_id: int, block_ids: frozenset):
+        self.page_id = page_id
+        self.block_ids = block_ids
+
+
+class TrackingTargetCache:
+    """
+    slug -> (page id, block ids) for validating tracking events without a
+    query per event. Unknown slugs are remembered too. Entries expire after
+    `ttl`, and this worker invalidates directly after its own page and
+    block writes. Pages and blocks created by other workers are found by
+    rechecking a slug on a miss, at most once per `recheck` seconds so
+    bogus slugs cannot cause a query per request.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, recheck: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.recheck = recheck
+        self._entries: "OrderedDict[str, tuple[float, Optional[TrackingTarget]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve_many(self, db: Session, slugs, recheck=()) -> dict[str, TrackingTarget]:
+        """
+        Targets for the given slugs; unknown slugs are left out. Slugs in
+        `recheck` missed in the cache and are reloaded if their entry is
+        older than `self.recheck` seconds.
+        """
+        now = time.monotonic()
+        found: dict[str, TrackingTarget] = {}
+        missing = set()
+        with self._lock:
+            for slug in set(slugs):
+                entry = self._entries.get(slug)
+                if (
+                    entry is None
+                    or entry[0] < now
+                    or (slug in recheck and entry[0] - self.ttl + self.recheck <= now)
+                ):
+                    missing.add(slug)
+                    continue
+                self._entries.move_to_end(slug)
+                if entry[1] is not None:
+                    found[slug] = entry[1]
+
+        if missing:
+            pages = dict(db.execute(select(Page.slug, Page.id).where(Page.slug.in_(missing))).all())
+            blocks: dict[int, set] = {page_id: set() for page_id in pages.values()}
+            if pages:
+                for page_id, block_id in db.execute(
+                    select(Block.page_id, Block.id).where(Block.page_id.in_(pages.values()))
+                ):
+                    blocks[page_id].add(block_id)
+
+            with self._lock:
+                for slug in missing:
+                    target = None
+                    if slug in pages:
+                        target = TrackingTarget(pages[slug], frozenset(blocks[pages[slug]]))
+                        found[slug] = target
+                    self._entries[slug] = (now + self.ttl, target)
+                    self._entries.move_to_end(slug)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        return found
+
+    def resolve(self, db: Session, slug: str, recheck: bool = False) -> Optional[TrackingTarget]:
+        return self.resolve_many(db, [slug], {slug} if recheck else ()).get(slug)
+
+    def invalidate(self, *slugs: str):
+        with self._lock:
+            for slug in slugs:
+                self._entries.pop(slug, None)
+
+
+tracking_targets = TrackingTargetCache(
+    TRACKING_TARGET_CACHE_SIZE,
+    TRACKING_TARGET_CACHE_TTL,
+    TRACKING_TARGET_RECHECK,
+)
@@ -0,0 +1,105 @@
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Above this many events per second on one page, only a sample of its raw
+# events is stored. 0 disables sampling.
+TRACKING_SAMPLE_RATE_THRESHOLD = float(os.getenv("TRACKING_SAMPLE_RATE_THRESHOLD", "50"))
+# Rates are measured over windows of this many seconds; the sampling
+# factor chosen at the end of a window applies to the next one.
+TRACKING_SAMPLE_WINDOW = float(os.getenv("TRACKING_SAMPLE_WINDOW", "10"))
+TRACKING_SAMPLE_MAX_FACTOR = int(os.getenv("TRACKING_SAMPLE_MAX_FACTOR", "1000"))
+
+
+class AdaptiveSampler:
+    """
+    Per-page 1-in-N sampling of raw tracking rows.
+
+    Each page's event rate is measured per window. While a page runs above
+    `threshold` events/s, N is chosen to bring its stored rows back down
+    to about `threshold` per second. Every stored row carries the number of
+    events it stands for in `sample_weight`, and within a batch the weights
+    of each page/block add up to exactly the number of events, so
+    SUM(sample_weight) is an exact count.
+    """
+
+    def __init__(self, threshold: float, window: float, max_factor: int):
+        self.threshold = threshold
+        self.window = window
+        self.max_factor = max_factor
+        self._window_start = time.monotonic()
+        self._counts: defaultdict[int, int] = defaultdict(int)
+        self._factors: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+
+    def _roll_window(self, now: float):
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return
+        factors = {}
+        for page_id, count in self._counts.items():
+            factor = math.ceil(count / elapsed / self.threshold)
+            if factor > 1:
+                factors[page_id] = min(factor, self.max_factor)
+        self._factors = factors
+        self._counts = defaultdict(int)
+        self._window_start = now
+
+    def sample(self, rows: list[dict]) -> list[dict]:
+        """
+        Rows to store, each with `sample_weight` set. Rows are grouped by
+        (page_id, block_id); in a sampled group every Nth row is kept with
+        weight N, and the last row kept absorbs the remainder.
+        """
+        if self.threshold <= 0:
+            for row in rows:
+                row["sample_weight"] = 1
+            return rows
+
+        with self._lock:
+            self._roll_window(time.monotonic())
+            for row in rows:
+                self._counts[row["page_id"]] += 1
+            factors = dict(self._factors)
+
+        groups: defaultdict[tuple, list] = defaultdict(list)
+        kept = []
+        for row in rows:
+            factor = factors.get(row["page_id"], 1)
+            if factor == 1:
+                row["sample_weight"] = 1
+                kept.append(row)
+            else:
+                groups[(row["page_id"], row.get("block_id"))].append(row)
+
+        for (page_id, _), group in groups.items():
+            factor = factors[page_id]
+            chosen = group[factor - 1::factor]
+            for row in chosen:
+                row["sample_weight"] = factor
+            remainder = len(group) - len(chosen) * factor
+            if remainder:
+                group[-1]["sample_weight"] = remainder
+                chosen.append(group[-1])
+            kept.extend(chosen)
+
+        self.sampled_out += len(rows) - len(kept)
+        return kept
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "sampled_pages": dict(self._factors),
+                "sampled_out": self.sampled_out,
+            }
+
+
+tracking_sampler = AdaptiveSampler(
+    TRACKING_SAMPLE_RATE_THRESHOLD,
+    TRACKING_SAMPLE_WINDOW,
+    TRACKING_SAMPLE_MAX_FACTOR,
+)
@@ -0,0 +1,129 @@
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+import numpy as np
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+from models.page import PageView, LinkClick
+from models.tracking_rollup import PageViewDaily, LinkClickDaily
+
+Interval = Literal["day", "hour"]
+
+
+def _bucket(session: Session, column, interval: Interval):
+    if session.get_bind().dialect.name == "postgresql":
+        # date() and date_trunc() would bucket in the session time zone
+        utc = func.timezone("UTC", column)
+        return func.date(utc) if interval == "day" else func.date_trunc("hour", utc)
+    # SQLite stores the naive UTC timestamps as written
+    if interval == "day":
+        return func.date(column)
+    return func.strftime("%Y-%m-%d %H:00:00", column)
+
+
+def _range(start: date, end: date) -> tuple[datetime, datetime]:
+    return datetime(start.year, start.month, start.day), datetime(end.year, end.month, end.day) + timedelta(days=1)
+
+
+def _views_query(session: Session, page_id: int, interval: Interval, start: date, end: date):
+    lo, hi = _range(start, end)
+    bucket = _bucket(session, PageView.created_at, interval)
+    raw = select(bucket.label("bucket"), PageView.sample_weight.label("n")).where(
+        PageView.page_id == page_id, PageView.created_at >= lo, PageView.created_at < hi
+    )
+    parts = [raw]
+    if interval == "day":
+        # Days older than the raw retention horizon only exist compacted
+        parts.append(
+            select(func.date(PageViewDaily.day).label("bucket"), PageViewDaily.views.label("n")).where(
+                PageViewDaily.page_id == page_id, PageViewDaily.day >= start, PageViewDaily.day <= end
+            )
+        )
+    events = union_all(*parts).subquery()
+    return select(events.c.bucket, func.sum(events.c.n)).group_by(events.c.bucket)
+
+
+def _clicks_query(session: Session, page_id: int, interval: Interval, start: date, end: date):
+    lo, hi = _range(start, end)
+    bucket = _bucket(session, LinkClick.created_at, interval)
+    raw = select(
+        LinkClick.block_id.label("block_id"), bucket.label("bucket"), LinkClick.sample_weight.label("n")
+    ).where(LinkClick.page_id == page_id, LinkClick.created_at >= lo, LinkClick.created_at < hi)
+    parts = [raw]
+    if interval == "day":
+        parts.append(
+            select(
+                LinkClickDaily.block_id.label("block_id"),
+                func.date(LinkClickDaily.day).label("bucket"),
+                LinkClickDaily.clicks.label("n"),
+            ).where(LinkClickDaily.page_id == page_id, LinkClickDaily.day >= start, LinkClickDaily.day <= end)
+        )
+    events = union_all(*parts).subquery()
+    return select(events.c.block_id, events.c.bucket, func.sum(events.c.n)).group_by(
+        events.c.block_id, events.c.bucket
+    )
+
+
+def _bucket_index(keys, origin: np.datetime64, unit: str) -> np.ndarray:
+    # Buckets come back as strings (SQLite) or datetimes (Postgres)
+    stamps = np.array([str(k) for k in keys], dtype=f"datetime64[{unit}]")
+    return (stamps - origin).astype(np.int64)
+
+
+def page_time_series(
+    db: Session,
+    page_id: int,
+    interval: Interval,
+    start: date,
+    end: date,
+) -> dict:
+    """
+    Views and clicks per day or hour between `start` and `end` (inclusive
+    days, UTC), as NumPy arrays aligned on the same buckets:
+
+        buckets            datetime64 bucket starts
+        views, clicks      int64 per bucket
+        block_ids          int64 ids of blocks with clicks in the range
+        block_clicks       int64 matrix, one row per block_ids entry
+
+    Each table is read with one grouped query (raw events plus, for daily
+    series, the compacted rollups); empty buckets are filled with zeros.
+    """
+    unit = "D" if interval == "day" else "h"
+    origin = np.datetime64(start, unit)
+    buckets = np.arange(origin, np.datetime64(end + timedelta(days=1), unit))
+    size = len(buckets)
+
+    views = np.zeros(size, dtype=np.int64)
+    rows = db.execute(_views_query(db, page_id, interval, start, end)).all()
+    if rows:
+        keys, counts = zip(*rows)
+        index = _bucket_index(keys, origin, unit)
+        valid = (index >= 0) & (index < size)
+        np.add.at(views, index[valid], np.array(counts, dtype=np.int64)[valid])
+
+    rows = db.execute(_clicks_query(db, page_id, interval, start, end)).all()
+    if rows:
+        block_keys, keys, counts = zip(*rows)
+        block_ids, block_index = np.unique(np.array(block_keys, dtype=np.int64), return_inverse=True)
+        index = _bucket_index(keys, origin, unit)
+        valid = (index >= 0) & (index < size)
+        block_clicks = np.zeros((len(block_ids), size), dtype=np.int64)
+        np.add.at(block_clicks, (block_index[valid], index[valid]), np.array(counts, dtype=np.int64)[valid])
+    else:
+        block_ids = np.zeros(0, dtype=np.int64)
+        block_clicks = np.zeros((0, size), dtype=np.int64)
+
+    return {
+        "buckets": buckets,
+        "views": views,
+        "clicks": block_clicks.sum(axis=0),
+        "block_ids": block_ids,
+        "block_clicks": block_clicks,
+    }
+
+
+def click_through_rate(clicks: np.ndarray, views: np.ndarray) -> np.ndarray:
+    """clicks / views per bucket (broadcasts over block rows), 0 where there were no views."""
+    return np.divide(clicks, views, out=np.zeros(np.broadcast(clicks, views).shape), where=views > 0)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# A repeat view of the same page from the same IP and user agent within
+# this many seconds of the previous one is not recorded, so a visitor who
+# keeps reloading is counted once. 0 disables.
+TRACKING_DEDUP_WINDOW = float(os.getenv("TRACKING_DEDUP_WINDOW", "30"))
+TRACKING_DEDUP_MAX_KEYS = int(os.getenv("TRACKING_DEDUP_MAX_KEYS", "200000"))
+
+
+class ViewDeduplicator:
+    """
+    Expiring set of recently seen (page_id, ip, user agent) keys.
+
+    The window slides: every view, counted or not, restarts it. Keys are
+    kept in the order they were last seen, so expired ones are always at
+    the front and are evicted as new views arrive. Memory is
+    bounded by `max_keys`; under pressure the oldest keys go first, which
+    only means a few duplicates get counted.
+    """
+
+    def __init__(self, window: float, max_keys: int):
+        self.window = window
+        self.max_keys = max_keys
+        self._seen: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.suppressed = 0
+
+    @staticmethod
+    def _key(page_id: int, ip_address: Optional[str], user_agent: Optional[str]) -> bytes:
+        raw = f"{page_id}|{ip_address or ''}|{user_agent or ''}".encode()
+        return hashlib.blake2b(raw, digest_size=12).digest()
+
+    def should_record(self, page_id: int, ip_address: Optional[str], user_agent: Optional[str]) -> bool:
+        # Without an IP, visitors sharing a common user agent would all
+        # collapse into one key; count them all instead.
+        if self.window <= 0 or not ip_address:
+            return True
+
+        key = self._key(page_id, ip_address, user_agent)
+        now = time.monotonic()
+        with self._lock:
+            self.checked += 1
+            while self._seen:
+                oldest, seen_at = next(iter(self._seen.items()))
+                if seen_at > now - self.window and len(self._seen) < self.max_keys:
+                    break
+                del self._seen[oldest]
+
+            duplicate = key in self._seen
+            self._seen[key] = now
+            self._seen.move_to_end(key)
+            if duplicate:
+                self.suppressed += 1
+            return not duplicate
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "window": self.window,
+                "keys": len(self._seen),
+                "checked": self.checked,
+                "suppressed": self.suppressed,
+            }
+
+
+view_dedup = ViewDeduplicator(TRACKING_DEDUP_WINDOW, TRACKING_DEDUP_MAX_KEYS)
@@ -0,0 +1,92 @@
+import os
+import sys
+import tempfile
+import uuid
+from typing import Optional
+
+import pytest
+
+# Settings are read when modules are imported, so point the app at
+# throwaway databases before anything from the server is loaded.
+_TMP_DIR = tempfile.mkdtemp(prefix="myshortbiz-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/main.db"
+os.environ["ANALYTICS_DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/analytics.db"
+os.environ["STATIC_PAGES_DIR"] = ""
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register and log in a fresh user; returns its Authorization header."""
+
+    def make(role: str = "user", tokens: Optional[int] = None) -> dict:
+        email = f"{uuid.uuid4().hex[:12]}@example.com"
+        client.post("/auth/register", json={"email": email, "password": "pw", "role": role})
+        if tokens is not None:
+            from sqlalchemy import update
+
+            from db import engine
+            from models import User
+
+            with engine.begin() as conn:
+                conn.execute(update(User).where(User.email == email).values(tokens_remaining=tokens))
+        token = client.post("/auth/login", data={"username": email, "password": "pw"}).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    return make
+
+
+@pytest.fixture
+def page(client, auth_headers):
+    """A user with a page; returns (headers, slug)."""
+    headers = auth_headers()
+    slug = f"p-{uuid.uuid4().hex[:10]}"
+    r = client.put("/content/me/page", json={"slug": slug, "title": "Test page"}, headers=headers)
+    assert r.status_code == 200, r.text
+    return headers, slug
+
+
+@pytest.fixture
+def db(client):
+    from db import SessionLocal
+
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def short_link(db):
+    """A committed ShortLink with a unique code."""
+    from models import ShortLink
+
+    link = ShortLink(user_id="test-user", original_url="https://example.com/old", short_code=uuid.uuid4().hex[:10])
+    db.add(link)
+    db.commit()
+    return link
+
+
+@pytest.fixture
+def tracked(client, monkeypatch):
+    """Events the tracking endpoints submit, captured instead of queued."""
+    from services.tracking_ingest import tracking_queue
+
+    events = []
+
+    def submit(batch):
+        events.extend(batch)
+        return True
+
+    monkeypatch.setattr(tracking_queue, "submit", submit)
+    return events
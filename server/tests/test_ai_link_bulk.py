@@ -0,0 +1,96 @@
+import json
+import types
+import uuid
+
+import pytest
+from sqlalchemy import event
+
+from db import engine
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    def create(model, input):
+        return types.SimpleNamespace(
+            output=[],
+            output_text=json.dumps({"short_code": "bulk-" + uuid.uuid4().hex[:8], "title": "T", "cta_text": "Go"}),
+            usage=types.SimpleNamespace(input_tokens=10, output_tokens=10, total_tokens=20),
+        )
+
+    monkeypatch.setattr("services.ai_link_service.client.responses.create", create)
+
+
+def test_bulk_generate_streams_results(client, auth_headers, fake_openai):
+    headers = auth_headers(tokens=100_000)
+    items = [{"original_url": f"https://example.com/{i}"} for i in range(3)] + [{"original_url": "not a url"}]
+
+    link_lookups = []
+
+    def count_link_lookups(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT") and "WHERE short_links.id =" in statement:
+            link_lookups.append(statement)
+
+    event.listen(engine, "after_cursor_execute", count_link_lookups)
+    try:
+        r = client.post("/ai/link/generate/bulk", json=items, headers=headers)
+    finally:
+        event.remove(engine, "after_cursor_execute", count_link_lookups)
+
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    ok = [line for line in lines if line.get("ok") is True]
+    assert sorted(line["index"] for line in ok) == [0, 1, 2]
+    assert [line["index"] for line in lines if line.get("ok") is False] == [3]
+    assert lines[-1]["done"] and lines[-1]["created"] == 3
+    # Results are captured before the commit, not reloaded one by one.
+    assert link_lookups == []
+
+
+def test_bulk_generate_rejects_empty_body(client, auth_headers):
+    r = client.post("/ai/link/generate/bulk", json=[], headers=auth_headers())
+    assert r.status_code == 400
+
+
+def _balance(headers, client):
+    return client.get("/auth/me", headers=headers).json()["tokens_remaining"]
+
+
+def test_bulk_generate_rejects_batches_the_balance_cannot_cover(client, auth_headers, monkeypatch):
+    calls = []
+    monkeypatch.setattr("services.ai_link_service.client.responses.create", lambda **kw: calls.append(kw))
+    headers = auth_headers(tokens=1)
+    items = [{"original_url": f"https://example.com/{i}"} for i in range(50)]
+
+    r = client.post("/ai/link/generate/bulk", json=items, headers=headers)
+
+    assert r.status_code == 402
+    assert calls == []
+    assert _balance(headers, client) == 1
+
+
+def test_bulk_generate_charges_actual_cost_and_refunds_the_rest(client, auth_headers, fake_openai):
+    headers = auth_headers(tokens=10)
+    items = [{"original_url": f"https://example.com/{i}"} for i in range(5)]
+
+    r = client.post("/ai/link/generate/bulk", json=items, headers=headers)
+
+    summary = [json.loads(line) for line in r.text.splitlines()][-1]
+    # 5 reserved; 100 OpenAI tokens bill as 1 platform token.
+    assert summary["tokens_used"] == 1
+    assert summary["tokens_remaining"] == 9
+    assert _balance(headers, client) == 9
+
+
+def test_bulk_generate_refunds_when_every_item_fails(client, auth_headers, monkeypatch):
+    def create(**kw):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr("services.ai_link_service.client.responses.create", create)
+    headers = auth_headers(tokens=10)
+    items = [{"original_url": f"https://example.com/{i}"} for i in range(3)]
+
+    r = client.post("/ai/link/generate/bulk", json=items, headers=headers)
+
+    summary = [json.loads(line) for line in r.text.splitlines()][-1]
+    assert summary == {"done": True, "created": 0, "failed": 3, "tokens_used": 0, "tokens_remaining": 10}
+    assert _balance(headers, client) == 10
@@ -0,0 +1,40 @@
+import csv
+import io
+import uuid
+from datetime import datetime, timedelta
+
+from db import analytics_engine, engine
+from models import ShortLink, ShortLinkClickEvent
+
+
+def test_short_link_export_covers_every_chunk(client, auth_headers, monkeypatch):
+    monkeypatch.setattr("services.analytics_export.EXPORT_LINK_CHUNK", 7)
+    headers = auth_headers()
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+
+    prefix = uuid.uuid4().hex[:8]
+    with engine.begin() as conn:
+        conn.execute(
+            ShortLink.__table__.insert(),
+            [{"user_id": user_id, "original_url": "https://example.com", "short_code": f"{prefix}-{i}"} for i in range(30)],
+        )
+        link_ids = [row.id for row in conn.execute(ShortLink.__table__.select().where(ShortLink.user_id == user_id))]
+
+    now = datetime.utcnow()
+    with analytics_engine.begin() as conn:
+        conn.execute(
+            ShortLinkClickEvent.__table__.insert(),
+            [{"short_link_id": link_id, "created_at": now - timedelta(minutes=i)} for i, link_id in enumerate(link_ids)],
+        )
+
+    r = client.get("/api/me/analytics/export?kind=short_links", headers=headers)
+    assert r.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert sorted(int(row["short_link_id"]) for row in rows) == sorted(link_ids)
+    assert {row["short_code"] for row in rows} == {f"{prefix}-{i}" for i in range(30)}
+
+
+def test_short_link_export_without_links(client, auth_headers):
+    r = client.get("/api/me/analytics/export?kind=short_links", headers=auth_headers())
+    assert r.status_code == 200
+    assert r.text.splitlines() == ["id,created_at,short_link_id,short_code,user_agent,referrer"]
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from services.block_ranks import DIGITS, rank_between, spread_ranks
+
+
+def _valid(rank: str) -> bool:
+    return bool(rank) and not rank.endswith("0") and set(rank) <= set(DIGITS)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rank_between_stays_strictly_between(seed):
+    rng = random.Random(seed)
+    ranks = [rank_between(None, None)]
+    for _ in range(300):
+        i = rng.randrange(len(ranks) + 1)
+        before = ranks[i - 1] if i > 0 else None
+        after = ranks[i] if i < len(ranks) else None
+        rank = rank_between(before, after)
+
+        assert _valid(rank)
+        assert before is None or before < rank
+        assert after is None or rank < after
+        ranks.insert(i, rank)
+
+    assert ranks == sorted(ranks)
+    assert len(set(ranks)) == len(ranks)
+
+
+def test_repeated_inserts_at_one_spot():
+    # Always inserting right after the first key is the worst case for length.
+    first, last = rank_between(None, None), None
+    for _ in range(200):
+        rank = rank_between(first, last)
+        assert first < rank and (last is None or rank < last)
+        last = rank
+
+
+def test_rank_between_rejects_unordered_bounds():
+    with pytest.raises(ValueError):
+        rank_between("b", "a")
+    with pytest.raises(ValueError):
+        rank_between("a", "a")
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 5, 35, 36, 100, 1000, 5000])
+def test_spread_ranks_sorted_and_spaced(count):
+    ranks = spread_ranks(count)
+
+    assert len(ranks) == count
+    assert ranks == sorted(ranks)
+    assert len(set(ranks)) == count
+    assert all(_valid(r) for r in ranks)
+    # There is room before, between and after every key.
+    for before, after in zip([None, *ranks], [*ranks, None]):
+        rank_between(before, after)
+
+
+def test_ranks_sort_the_same_case_insensitively():
+    ranks = spread_ranks(500)
+    assert sorted(ranks, key=str.lower) == ranks
+
+
+def _create_blocks(client, headers, n):
+    return [
+        client.post("/content/me/blocks", json={"label": f"B{i}", "url": "https://example.com"}, headers=headers).json()["id"]
+        for i in range(n)
+    ]
+
+
+def test_move_between_neighbors(client, page):
+    headers, _ = page
+    a, b, c = _create_blocks(client, headers, 3)
+
+    r = client.patch(f"/content/me/blocks/{c}", json={"after_block_id": a, "before_block_id": b}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert [x["id"] for x in client.get("/content/me/blocks", headers=headers).json()] == [a, c, b]
+
+
+@pytest.mark.parametrize("neighbors", ["inverted", "same"])
+def test_move_with_bad_neighbors_is_rejected(client, page, neighbors):
+    headers, _ = page
+    a, b, c = _create_blocks(client, headers, 3)
+    after, before = (b, a) if neighbors == "inverted" else (a, a)
+
+    r = client.patch(f"/content/me/blocks/{c}", json={"after_block_id": after, "before_block_id": before}, headers=headers)
+    assert r.status_code == 400
+    assert [x["id"] for x in client.get("/content/me/blocks", headers=headers).json()] == [a, b, c]
+
@@ -0,0 +1,87 @@
+import uuid
+
+import pytest
+
+
+def _create_block(client, headers, label="B"):
+    return client.post("/content/me/blocks", json={"label": label, "url": "https://example.com"}, headers=headers).json()["id"]
+
+
+@pytest.mark.parametrize("field", ["label", "is_primary", "is_active"])
+def test_bulk_upsert_rejects_null_fields(client, page, field):
+    headers, _ = page
+    block_id = _create_block(client, headers)
+
+    r = client.post("/content/me/blocks/bulk", json={"blocks": [{"id": block_id, field: None}]}, headers=headers)
+    assert r.status_code == 422
+    assert client.get("/content/me/blocks", headers=headers).json()[0]["label"] == "B"
+
+
+def test_patch_rejects_null_label(client, page):
+    headers, _ = page
+    block_id = _create_block(client, headers)
+
+    r = client.patch(f"/content/me/blocks/{block_id}", json={"label": None}, headers=headers)
+    assert r.status_code == 422
+
+
+def test_bulk_upsert_updates_and_creates(client, page):
+    headers, _ = page
+    block_id = _create_block(client, headers)
+
+    r = client.post(
+        "/content/me/blocks/bulk",
+        json={"blocks": [{"id": block_id, "label": "Renamed"}, {"label": "New", "url": "https://example.org"}]},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.text
+    assert [b["label"] for b in r.json()] == ["Renamed", "New"]
+
+
+def _order(client, headers):
+    return [block["id"] for block in client.get("/content/me/blocks", headers=headers).json()]
+
+
+def test_reorder_blocks(client, page):
+    headers, slug = page
+    a, b, c = (_create_block(client, headers, label) for label in "abc")
+
+    r = client.put("/content/me/blocks/order", json={"block_ids": [c, a, b]}, headers=headers)
+
+    assert r.status_code == 200, r.text
+    assert [block["id"] for block in r.json()] == [c, a, b]
+    assert [block["sort_order"] for block in r.json()] == [1, 2, 3]
+    assert _order(client, headers) == [c, a, b]
+    assert [block["id"] for block in client.get(f"/content/public/pages/{slug}").json()["blocks"]] == [c, a, b]
+
+
+def test_reorder_rejects_another_users_blocks(client, page, auth_headers):
+    headers, _ = page
+    a, b = _create_block(client, headers), _create_block(client, headers)
+    other = auth_headers()
+    client.put("/content/me/page", json={"slug": f"p-{uuid.uuid4().hex[:10]}", "title": "Other"}, headers=other)
+    foreign = _create_block(client, other)
+
+    for block_ids in ([a, b, foreign], [a, foreign]):
+        r = client.put("/content/me/blocks/order", json={"block_ids": block_ids}, headers=headers)
+        assert r.status_code == 400
+    r = client.put("/content/me/blocks/order", json={"block_ids": [foreign]}, headers=other)
+    assert r.status_code == 200
+    assert _order(client, headers) == [a, b]
+
+
+@pytest.mark.parametrize("ids", ["duplicate", "missing", "unknown", "empty"])
+def test_reorder_requires_every_block_exactly_once(client, page, ids):
+    headers, _ = page
+    a, b, c = (_create_block(client, headers) for _ in range(3))
+    block_ids = {
+        "duplicate": [a, b, c, a],
+        "missing": [a, b],
+        "unknown": [a, b, c, 10**9],
+        "empty": [],
+    }[ids]
+
+    r = client.put("/content/me/blocks/order", json={"block_ids": block_ids}, headers=headers)
+
+    assert r.status_code == 400
+    assert _order(client, headers) == [a, b, c]
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from db import AnalyticsBase
+from services.campaigns import campaign_report, increment_campaigns, parse_utm
+
+
+def test_parse_utm_prefers_the_first_url_with_utm():
+    assert parse_utm(
+        "https://me.example/p?utm_source=news&utm_campaign=%20spring%20",
+        "https://ref.example/?utm_source=other",
+    ) == {"utm_source": "news", "utm_medium": None, "utm_campaign": "spring"}
+    assert parse_utm(None, "https://ref.example/?utm_medium=email") == {
+        "utm_source": None,
+        "utm_medium": "email",
+        "utm_campaign": None,
+    }
+
+
+def test_parse_utm_without_parameters():
+    empty = {"utm_source": None, "utm_medium": None, "utm_campaign": None}
+    assert parse_utm() == empty
+    assert parse_utm("https://me.example/p?utm_other=1", "") == empty
+    assert parse_utm("http://[bad/?utm_source=x") == empty
+    assert len(parse_utm("/?utm_source=" + "x" * 400)["utm_source"]) == 255
+
+
+def test_increment_and_report(tmp_path):
+    analytics = create_engine(f"sqlite:///{tmp_path}/analytics.db")
+    AnalyticsBase.metadata.create_all(analytics)
+    at = datetime(2026, 4, 2, 9)
+
+    def event(block_id=None, **utm):
+        return {
+            "page_id": 1,
+            "block_id": block_id,
+            "created_at": at,
+            **parse_utm("/?" + "&".join(f"{k}={v}" for k, v in utm.items())),
+        }
+
+    events = [event(utm_source="news")] * 3 + [event(5, utm_source="news")] * 2
+    events += [event(utm_source="ads", utm_medium="cpc")] * 4 + [event()] * 10
+    with analytics.begin() as conn:
+        increment_campaigns(conn, events[:6])
+    with analytics.begin() as conn:
+        increment_campaigns(conn, events[6:])
+
+    with Session(analytics) as db:
+        rows = campaign_report(db, 1, date(2026, 4, 1), date(2026, 4, 30))
+        assert [tuple(r) for r in rows] == [("ads", "cpc", "", 4, 0), ("news", "", "", 3, 2)]
+        assert campaign_report(db, 1, date(2026, 4, 3), date(2026, 4, 30)) == []
@@ -0,0 +1,30 @@
+from starlette.requests import Request
+
+from utils.client_ip import client_ip
+
+
+def _request(peer, headers=()):
+    return Request({
+        "type": "http",
+        "client": (peer, 1234) if peer else None,
+        "headers": [(k.encode(), v.encode()) for k, v in headers],
+    })
+
+
+def test_direct_client():
+    assert client_ip(_request("203.0.113.9", [("x-forwarded-for", "1.1.1.1")])) == "203.0.113.9"
+
+
+def test_forwarded_by_trusted_proxy():
+    request = _request("127.0.0.1", [("x-forwarded-for", "6.6.6.6, 203.0.113.9")])
+    # The left-most entry is whatever the client sent; the proxy appended the real one.
+    assert client_ip(request) == "203.0.113.9"
+
+
+def test_real_ip_fallback():
+    assert client_ip(_request("127.0.0.1", [("x-real-ip", "203.0.113.9")])) == "203.0.113.9"
+
+
+def test_unknown_behind_proxy_without_headers():
+    assert client_ip(_request("127.0.0.1")) is None
+    assert client_ip(_request(None)) is None
@@ -0,0 +1,102 @@
+import random
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from db import AnalyticsBase
+from services.heavy_hitters import DIRECT, HeavyHitterStore, SpaceSaving, referrer_host
+
+
+def _stream(rng, n):
+    # Zipf-like: a few heavy items and a long tail.
+    return [f"item-{min(int(rng.paretovariate(1.1)), 5000)}" for _ in range(n)]
+
+
+def _check_bounds(sketch, truth):
+    bound = sketch.total / sketch.capacity
+    for item, count, error in sketch.top(sketch.capacity):
+        assert count - error <= truth[item] <= count
+        assert error <= bound
+    tracked = set(sketch.counts)
+    for item, n in truth.items():
+        if n > bound:
+            assert item in tracked
+
+
+def test_counts_and_errors_bound_the_truth():
+    rng = random.Random(20)
+    for _ in range(20):
+        items = _stream(rng, 5000)
+        sketch = SpaceSaving(capacity=30)
+        for item in items:
+            sketch.add(item)
+        assert sketch.total == len(items)
+        _check_bounds(sketch, Counter(items))
+
+
+def test_merge_keeps_the_bounds():
+    rng = random.Random(7)
+    for _ in range(20):
+        parts = [_stream(rng, rng.randint(0, 3000)) for _ in range(4)]
+        merged = SpaceSaving(capacity=25)
+        for part in parts:
+            sketch = SpaceSaving(capacity=25)
+            for item in part:
+                sketch.add(item)
+            merged.merge(SpaceSaving.from_json(sketch.to_json(), 25))
+        _check_bounds(merged, Counter(item for part in parts for item in part))
+
+
+def test_small_streams_are_exact():
+    sketch = SpaceSaving(capacity=10)
+    for item, n in (("a", 5), ("b", 3), ("c", 1)):
+        sketch.add(item, n)
+    assert sketch.top(2) == [("a", 5, 0), ("b", 3, 0)]
+
+
+def test_referrer_host():
+    assert referrer_host(None) == DIRECT
+    assert referrer_host("") == DIRECT
+    assert referrer_host("https://News.Example.com/a?b=c") == "news.example.com"
+
+
+def test_store_reads_pending_and_persisted(tmp_path):
+    analytics = create_engine(f"sqlite:///{tmp_path}/analytics.db")
+    AnalyticsBase.metadata.create_all(analytics)
+    day = date(2026, 5, 1)
+    at = datetime(2026, 5, 1, 12)
+    events = [{"page_id": 1, "block_id": None, "referrer": "https://a.example/x", "created_at": at}] * 3
+    events += [{"page_id": 1, "block_id": None, "referrer": None, "created_at": at}]
+    events += [{"page_id": 1, "block_id": 9, "referrer": None, "created_at": at}] * 2
+
+    store = HeavyHitterStore(analytics, capacity=10, interval=60, cache_size=100, cache_ttl=60)
+    store.record(events)
+    with Session(analytics) as db:
+        assert store.top(db, 1, "referrer", day, day, 5) == ([("a.example", 3, 0), (DIRECT, 1, 0)], 4)
+
+    assert store.persist() == 2
+    store.record(events[:1])
+    assert store.persist() == 1
+
+    fresh = HeavyHitterStore(analytics, capacity=10, interval=60, cache_size=100, cache_ttl=60)
+    with Session(analytics) as db:
+        assert fresh.top(db, 1, "referrer", day, day, 1) == ([("a.example", 4, 0)], 5)
+        assert fresh.top(db, 1, "block", day, day, 5) == ([("9", 2, 0)], 2)
+
+
+def test_tracking_prefers_the_reported_referrer(client, page, tracked):
+    _, slug = page
+    profile = f"http://testserver/{slug}"
+
+    def view(path, body, agent):
+        # A different user agent per request keeps view dedup out of the way.
+        client.post(f"/content/public/track/{path}", json=body, headers={"Referer": profile, "User-Agent": agent})
+
+    view("view", {"slug": slug, "referrer": "https://news.example/a"}, "a")
+    view("batch", [{"type": "view", "slug": slug, "referrer": ""}], "b")
+    view("batch", [{"type": "view", "slug": slug}], "c")
+
+    # An empty document.referrer is a direct visit, not the profile page.
+    assert [e["referrer"] for e in tracked] == ["https://news.example/a", None, profile]
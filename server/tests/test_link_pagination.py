@@ -0,0 +1,90 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from db import engine
+from models import ShortLink
+
+
+@pytest.fixture
+def links(client, auth_headers):
+    """A user with 7 links, two of them sharing a timestamp."""
+    headers = auth_headers()
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    times = [base + timedelta(minutes=i) for i in range(6)] + [base + timedelta(minutes=3)]
+    with engine.begin() as conn:
+        conn.execute(
+            ShortLink.__table__.insert(),
+            [
+                {"user_id": user_id, "original_url": "https://example.com", "short_code": uuid.uuid4().hex[:12], "created_at": t}
+                for t in times
+            ],
+        )
+    expected = [
+        link.id
+        for link in sorted(
+            _all_links(user_id), key=lambda link: (link.created_at, link.id), reverse=True
+        )
+    ]
+    return headers, expected
+
+
+def _all_links(user_id):
+    with engine.connect() as conn:
+        return conn.execute(ShortLink.__table__.select().where(ShortLink.user_id == user_id)).all()
+
+
+def _page(client, headers, cursor=None, limit=2):
+    params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+    r = client.get("/ai/link/my", params=params, headers=headers)
+    assert r.status_code == 200, r.text
+    return [link["id"] for link in r.json()], r.headers.get("x-next-cursor")
+
+
+def test_pages_cover_every_link_once(client, links):
+    headers, expected = links
+    seen, cursor = [], None
+    while True:
+        ids, cursor = _page(client, headers, cursor)
+        seen += ids
+        if not cursor:
+            break
+    assert seen == expected
+
+
+def test_deleted_cursor_row_does_not_end_pagination(client, links):
+    headers, expected = links
+    ids, cursor = _page(client, headers, limit=3)
+    with engine.begin() as conn:
+        conn.execute(ShortLink.__table__.delete().where(ShortLink.id == ids[-1]))
+
+    rest, _ = _page(client, headers, cursor, limit=100)
+    assert rest == expected[3:]
+
+
+def test_invalid_cursor(client, links):
+    headers, _ = links
+    r = client.get("/ai/link/my", params={"cursor": "bm9wZQ"}, headers=headers)
+    assert r.status_code == 400
+
+
+def test_links_sharing_a_server_default_timestamp(client, auth_headers):
+    headers = auth_headers()
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+    with engine.begin() as conn:
+        # No created_at: the database fills it in, usually the same second
+        conn.execute(
+            ShortLink.__table__.insert(),
+            [{"user_id": user_id, "original_url": "https://example.com", "short_code": uuid.uuid4().hex[:12]} for _ in range(5)],
+        )
+    expected = [link.id for link in sorted(_all_links(user_id), key=lambda link: (link.created_at, link.id), reverse=True)]
+
+    seen, cursor = [], None
+    for _ in range(10):
+        ids, cursor = _page(client, headers, cursor)
+        seen += ids
+        if not cursor:
+            break
+    assert seen == expected
@@ -0,0 +1,39 @@
+import os
+import stat
+
+from services.page_renderer import remove_static_page, render_page_html, write_static_page
+
+
+def test_written_page_is_world_readable(client, page, tmp_path):
+    _, slug = page
+    snapshot = client.get(f"/content/public/pages/{slug}").text
+
+    assert write_static_page(str(tmp_path), slug, snapshot)
+
+    path = tmp_path / slug / "index.html"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert "Test page" in path.read_text()
+    assert [p.name for p in (tmp_path / slug).iterdir()] == ["index.html"]
+
+
+def test_unsafe_slug_is_not_written(tmp_path):
+    assert not write_static_page(str(tmp_path), "../escape", '{"page": {}, "blocks": []}')
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_remove_static_page(client, page, tmp_path):
+    _, slug = page
+    write_static_page(str(tmp_path), slug, client.get(f"/content/public/pages/{slug}").text)
+
+    remove_static_page(str(tmp_path), slug)
+    assert not (tmp_path / slug).exists()
+
+
+def test_tracking_script_batches_events(client, page):
+    _, slug = page
+    html = render_page_html(client.get(f"/content/public/pages/{slug}").json())
+
+    assert '"/content/public/track/batch"' in html
+    assert "navigator.sendBeacon" in html and "keepalive:true" in html
+    assert "landing_url:location.href" in html and "referrer:document.referrer" in html
+    assert "/content/public/track/view" not in html
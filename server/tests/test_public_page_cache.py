@@ -0,0 +1,82 @@
+import json
+
+from sqlalchemy import event, select, update
+
+from db import engine
+from models import Page
+from routers.content import backfill_page_snapshots
+from services.public_page_cache import public_page_cache
+
+
+def test_edit_invalidates_cached_page(client, page):
+    headers, slug = page
+    first = client.get(f"/content/public/pages/{slug}")
+    assert first.status_code == 200
+
+    client.put("/content/me/page", json={"slug": slug, "title": "Renamed"}, headers=headers)
+
+    second = client.get(f"/content/public/pages/{slug}")
+    assert second.json()["page"]["title"] == "Renamed"
+    assert second.headers["etag"] != first.headers["etag"]
+
+
+def test_etag_revalidation(client, page):
+    _, slug = page
+    etag = client.get(f"/content/public/pages/{slug}").headers["etag"]
+
+    r = client.get(f"/content/public/pages/{slug}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+
+def test_bump_during_snapshot_read_is_not_cached_as_fresh(client, page):
+    """An edit committed between the snapshot query and caching the entry."""
+    headers, slug = page
+    page_id = client.get("/content/me/page", headers=headers).json()["id"]
+    public_page_cache.bump(page_id, 0, slug)
+
+    def bump_after_query(conn, cursor, statement, parameters, context, executemany):
+        if "snapshot_json" in statement and "FROM pages" in statement:
+            public_page_cache.bump(page_id, 1_000_000, slug)
+
+    event.listen(engine, "after_cursor_execute", bump_after_query)
+    try:
+        assert client.get(f"/content/public/pages/{slug}").status_code == 200
+    finally:
+        event.remove(engine, "after_cursor_execute", bump_after_query)
+
+    assert public_page_cache.get(slug) is None
+
+
+def test_edit_by_another_worker_is_seen_after_ttl(client, page, monkeypatch):
+    _, slug = page
+    body = client.get(f"/content/public/pages/{slug}").json()
+
+    # Another worker commits an edit; this process never sees a bump.
+    body["page"]["title"] = "Edited elsewhere"
+    with engine.begin() as conn:
+        conn.execute(
+            update(Page)
+            .where(Page.slug == slug)
+            .values(snapshot_json=json.dumps(body), version=Page.version + 1)
+        )
+
+    assert client.get(f"/content/public/pages/{slug}").json()["page"]["title"] == "Test page"
+    monkeypatch.setattr(public_page_cache, "ttl", 0)
+    assert client.get(f"/content/public/pages/{slug}").json()["page"]["title"] == "Edited elsewhere"
+
+
+def test_missing_snapshot_is_served_without_writing(client, page):
+    _, slug = page
+    with engine.begin() as conn:
+        conn.execute(update(Page).where(Page.slug == slug).values(snapshot_json=None))
+
+    r = client.get(f"/content/public/pages/{slug}")
+
+    assert r.status_code == 200
+    assert r.json()["page"]["title"] == "Test page"
+    with engine.connect() as conn:
+        assert conn.execute(select(Page.snapshot_json).where(Page.slug == slug)).scalar() is None
+
+    assert backfill_page_snapshots() >= 1
+    with engine.connect() as conn:
+        assert json.loads(conn.execute(select(Page.snapshot_json).where(Page.slug == slug)).scalar()) == r.json()
@@ -0,0 +1,33 @@
+import pytest
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        "utils.redirect_fast_path.click_aggregator.record",
+        lambda link_id, **kwargs: calls.append(link_id),
+    )
+    return calls
+
+
+def test_get_redirects_and_records(client, short_link, recorded):
+    r = client.get(f"/r/{short_link.short_code}", follow_redirects=False)
+
+    assert r.status_code == 307
+    assert r.headers["location"] == "https://example.com/old"
+    assert recorded == [short_link.id]
+
+
+def test_head_redirects_without_recording(client, short_link, recorded):
+    r = client.head(f"/r/{short_link.short_code}", follow_redirects=False)
+
+    assert r.status_code == 307
+    assert recorded == []
+
+
+def test_unknown_code(client, recorded):
+    r = client.get("/r/does-not-exist", follow_redirects=False)
+
+    assert r.status_code == 404
+    assert recorded == []
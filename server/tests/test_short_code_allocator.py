@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+
+from services.short_code_allocator import (
+    BloomFilter,
+    ShortCodeAllocationError,
+    ShortCodeAllocator,
+)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, fp_rate=0.01)
+    values = [f"code-{i}" for i in range(1000)]
+    for value in values:
+        bloom.add(value)
+
+    assert all(bloom.might_contain(v) for v in values)
+    false_positives = sum(bloom.might_contain(f"other-{i}") for i in range(10000))
+    assert false_positives < 300  # ~1% expected
+
+
+def test_allocate_skips_existing_codes(db, short_link):
+    allocator = ShortCodeAllocator(capacity=1000, fp_rate=0.01)
+    base = short_link.short_code
+
+    codes = allocator.allocate(db, [base, base, "fresh-" + uuid.uuid4().hex[:6]])
+
+    assert base not in codes
+    assert len(set(codes)) == 3
+    assert all(code.startswith(base + "-") for code in codes[:2])
+
+
+def test_filter_false_positive_keeps_the_preferred_code(db):
+    allocator = ShortCodeAllocator(capacity=10, fp_rate=0.01)
+    allocator._filter._bits[:] = b"\xff" * len(allocator._filter._bits)
+    slug = "free-" + uuid.uuid4().hex[:6]
+
+    assert allocator.allocate(db, [slug]) == [slug]
+
+
+def test_saturated_filter_gives_up(db, short_link):
+    allocator = ShortCodeAllocator(capacity=10, fp_rate=0.01)
+    allocator._filter._bits[:] = b"\xff" * len(allocator._filter._bits)
+
+    with pytest.raises(ShortCodeAllocationError):
+        allocator.allocate(db, [short_link.short_code])
+
+
+def test_record_conflicts_only_adds_taken_codes(db, short_link):
+    allocator = ShortCodeAllocator(capacity=1000, fp_rate=0.01)
+    free = "free-" + uuid.uuid4().hex[:6]
+
+    assert allocator.record_conflicts(db, [short_link.short_code, free]) == {short_link.short_code}
+    assert allocator._filter.might_contain(short_link.short_code)
+    assert not allocator._filter.might_contain(free)
+
+
+def test_warm_sizes_filter_from_row_count(db, short_link):
+    allocator = ShortCodeAllocator(capacity=1, fp_rate=0.01)
+    allocator.warm(db)
+
+    assert allocator._filter.size > BloomFilter(1, 0.01).size
+    assert allocator._filter.might_contain(short_link.short_code)
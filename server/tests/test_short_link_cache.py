@@ -0,0 +1,42 @@
+from services.short_link_cache import resolve_short_code, short_link_cache
+
+
+def test_update_invalidates_only_after_commit(db, short_link):
+    code = short_link.short_code
+    assert resolve_short_code(db, code) == (short_link.id, "https://example.com/old")
+
+    short_link.original_url = "https://example.com/new"
+    db.flush()
+    # Not committed yet: the cached (still current) URL stays.
+    assert short_link_cache.get(code) == (short_link.id, "https://example.com/old")
+
+    db.commit()
+    assert resolve_short_code(db, code) == (short_link.id, "https://example.com/new")
+
+
+def test_rollback_keeps_cache_entry(db, short_link):
+    code = short_link.short_code
+    resolve_short_code(db, code)
+
+    short_link.original_url = "https://example.com/discarded"
+    db.flush()
+    db.rollback()
+
+    assert short_link_cache.get(code) == (short_link.id, "https://example.com/old")
+    assert "short_link_codes" not in db.info
+
+
+def test_renamed_code_drops_old_code(db, short_link):
+    old_code = short_link.short_code
+    resolve_short_code(db, old_code)
+
+    short_link.short_code = old_code + "x"
+    db.commit()
+
+    assert resolve_short_code(db, old_code) is None
+    assert resolve_short_code(db, old_code + "x") == (short_link.id, "https://example.com/old")
+
+
+def test_unknown_codes_are_cached_as_misses(db):
+    assert resolve_short_code(db, "no-such-code") is None
+    assert short_link_cache.get("no-such-code") is None
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine
+
+from db import analytics_engine, engine
+from services.short_link_clicks import ClickAggregator
+
+
+def test_flush_writes_events_and_counts(db, short_link):
+    aggregator = ClickAggregator(analytics_engine, engine, interval=60, max_pending=100, max_size=100)
+    for _ in range(3):
+        aggregator.record(short_link.id, referrer="https://ref.example", user_agent="ua")
+
+    assert aggregator.flush() == 3
+    db.refresh(short_link)
+    assert short_link.click_count == 3
+    assert aggregator.stats()["pending"] == 0
+
+
+def test_buffer_is_bounded_and_drops_are_counted():
+    aggregator = ClickAggregator(analytics_engine, engine, interval=60, max_pending=100, max_size=5)
+    for _ in range(8):
+        aggregator.record(1)
+
+    assert aggregator.stats()["pending"] == 5
+    assert aggregator.stats()["dropped"] == 3
+
+
+def test_failed_flush_keeps_events_within_bound():
+    broken = create_engine("sqlite://")  # no tables: every insert fails
+    aggregator = ClickAggregator(broken, engine, interval=60, max_pending=100, max_size=5)
+    for _ in range(4):
+        aggregator.record(1)
+
+    events = aggregator._events
+    with pytest.raises(Exception):
+        aggregator.flush()
+    for _ in range(3):
+        aggregator.record(1)
+    assert aggregator.stats() == {"pending": 5, "max_size": 5, "pending_links": 0, "dropped": 2}
+    # The events that failed to write are the ones kept.
+    assert aggregator._events[:4] == events
+
+
+def test_stats_endpoint_requires_admin(client, auth_headers):
+    assert client.get("/ai/link/clicks/stats", headers=auth_headers()).status_code == 403
+    r = client.get("/ai/link/clicks/stats", headers=auth_headers(role="admin"))
+    assert r.status_code == 200 and "dropped" in r.json()
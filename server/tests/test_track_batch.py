@@ -0,0 +1,71 @@
+import json
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def target(client, page):
+    """(slug, block_id) of a page with one block."""
+    headers, slug = page
+    block_id = client.post(
+        "/content/me/blocks", json={"label": "B", "url": "https://example.com"}, headers=headers
+    ).json()["id"]
+    return slug, block_id
+
+
+def _post(client, body, content_type="application/json"):
+    if not isinstance(body, (str, bytes)):
+        body = json.dumps(body)
+    # A fresh user agent per request keeps view dedup out of the way.
+    headers = {"Content-Type": content_type, "User-Agent": uuid.uuid4().hex}
+    return client.post("/content/public/track/batch", content=body, headers=headers)
+
+
+def test_counts_accepted_and_rejected_events(client, target, tracked):
+    slug, block_id = target
+    r = _post(
+        client,
+        [
+            {"type": "view", "slug": slug, "landing_url": "https://me.example/?utm_source=news"},
+            {"type": "click", "slug": slug, "block_id": block_id},
+            {"type": "view", "slug": slug},  # repeat view, deduplicated
+            {"type": "click", "slug": slug, "block_id": block_id + 1000},
+            {"type": "click", "slug": slug},
+            {"type": "view", "slug": "no-such-page-" + uuid.uuid4().hex},
+            {"type": "like", "slug": slug},
+            "not an object",
+        ],
+    )
+
+    assert r.status_code == 202
+    assert r.json() == {"ok": True, "accepted": 2, "duplicates": 1, "rejected": 5}
+    assert [(e["block_id"], e["utm_source"]) for e in tracked] == [(None, "news"), (block_id, None)]
+
+
+def test_accepts_text_plain_from_send_beacon(client, target, tracked):
+    slug, block_id = target
+    body = json.dumps({"events": [{"type": "click", "slug": slug, "block_id": block_id}]})
+
+    r = _post(client, body, content_type="text/plain;charset=UTF-8")
+
+    assert r.status_code == 202
+    assert r.json()["accepted"] == 1
+    assert len(tracked) == 1
+
+
+@pytest.mark.parametrize("body", ["{not json", b"\xff\xfe", '{"type": "view"}', '"view"', "null"])
+def test_rejects_bodies_that_are_not_a_list_of_events(client, tracked, body):
+    r = _post(client, body)
+    assert r.status_code == 400
+    assert tracked == []
+
+
+def test_rejects_oversized_batches(client, target, tracked, monkeypatch):
+    slug, _ = target
+    monkeypatch.setattr("routers.content.TRACK_BATCH_MAX_EVENTS", 2)
+
+    r = _post(client, [{"type": "view", "slug": slug}] * 3)
+
+    assert r.status_code == 413
+    assert tracked == []
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from sqlalchemy import create_engine, insert, select
+
+from db import AnalyticsBase
+from models.page import LinkClick, PageView
+from models.tracking_rollup import LinkClickDaily, PageViewDaily
+from services.tracking_compaction import compact_tracking_events, raw_retention_cutoff
+
+
+def test_old_events_move_to_daily_rollups(tmp_path):
+    analytics = create_engine(f"sqlite:///{tmp_path}/analytics.db")
+    AnalyticsBase.metadata.create_all(analytics)
+    cutoff = raw_retention_cutoff(30)
+    old = cutoff - timedelta(days=1, hours=-3)
+    with analytics.begin() as conn:
+        conn.execute(
+            insert(PageView),
+            [{"page_id": 1, "created_at": old, "sample_weight": w} for w in (1, 1, 5)]
+            + [{"page_id": 1, "created_at": cutoff, "sample_weight": 1}],
+        )
+        conn.execute(
+            insert(LinkClick),
+            [{"page_id": 1, "block_id": 2, "created_at": old, "sample_weight": 1}] * 3,
+        )
+
+    # A chunk smaller than the backlog exercises the loop.
+    assert compact_tracking_events(analytics, horizon_days=30, chunk_size=2) == {
+        "page_views": 3,
+        "link_clicks": 3,
+    }
+    assert compact_tracking_events(analytics, horizon_days=30, chunk_size=2) == {
+        "page_views": 0,
+        "link_clicks": 0,
+    }
+
+    with analytics.connect() as conn:
+        assert conn.execute(select(PageViewDaily.page_id, PageViewDaily.day, PageViewDaily.views)).all() == [
+            (1, old.date(), 7)
+        ]
+        assert conn.execute(select(LinkClickDaily.clicks)).scalars().all() == [3]
+        assert conn.execute(select(PageView.created_at)).scalars().all() == [cutoff]
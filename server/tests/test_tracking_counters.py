@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401  (registers every table)
+from db import AnalyticsBase, Base
+from models import Page, PageView, TrackingCounter
+from services import tracking_counters
+from services.tracking_counters import (
+    PAGE_TOTAL,
+    backfill_counters,
+    increment_counters,
+    page_counters,
+    reconcile_counters,
+)
+
+
+@pytest.fixture
+def engines(tmp_path):
+    main = create_engine(f"sqlite:///{tmp_path}/main.db")
+    analytics = create_engine(f"sqlite:///{tmp_path}/analytics.db")
+    Base.metadata.create_all(main)
+    AnalyticsBase.metadata.create_all(analytics)
+    return main, analytics
+
+
+def _counters(analytics):
+    with analytics.connect() as conn:
+        return {(r.page_id, r.block_id): (r.views, r.clicks) for r in conn.execute(select(TrackingCounter))}
+
+
+def test_increment_counters(engines):
+    _, analytics = engines
+    with analytics.begin() as conn:
+        increment_counters(conn, [{"page_id": 1}, {"page_id": 1}, {"page_id": 1, "block_id": 5}])
+        increment_counters(conn, [{"page_id": 1, "block_id": 5}])
+
+    assert _counters(analytics) == {(1, PAGE_TOTAL): (2, 2), (1, 5): (0, 2)}
+    with Session(analytics) as db:
+        assert page_counters(db, 1) == (2, 2)
+        assert page_counters(db, 1, 5) == (0, 2)
+        assert page_counters(db, 2) == (0, 0)
+
+
+def test_reconcile_sums_sample_weights(engines):
+    main, analytics = engines
+    with main.begin() as conn:
+        conn.execute(Page.__table__.insert(), [{"id": 1, "slug": "a", "title": "A"}])
+    with analytics.begin() as conn:
+        conn.execute(
+            PageView.__table__.insert(),
+            [{"page_id": 1, "created_at": datetime(2026, 1, 1), "sample_weight": w} for w in (1, 4)],
+        )
+        increment_counters(conn, [{"page_id": 1}])
+
+    drift = reconcile_counters(analytics, pages_bind=main)
+
+    assert drift == {1: {PAGE_TOTAL: ((1, 0), (5, 0))}}
+    assert _counters(analytics) == {(1, PAGE_TOTAL): (5, 0)}
+
+
+def test_backfill_runs_once(engines, monkeypatch):
+    main, analytics = engines
+    with main.begin() as conn:
+        conn.execute(Page.__table__.insert(), [{"id": 1, "slug": "a", "title": "A"}])
+    with analytics.begin() as conn:
+        conn.execute(PageView.__table__.insert(), [{"page_id": 1, "created_at": datetime(2026, 1, 1)}])
+    calls = []
+    real = tracking_counters.reconcile_counters
+    monkeypatch.setattr(tracking_counters, "reconcile_counters", lambda *a, **kw: calls.append(1) or real(*a, **kw))
+
+    assert backfill_counters(analytics, pages_bind=main) == 1
+    assert backfill_counters(analytics, pages_bind=main) == 0
+
+    assert calls == [1]
+    # Only real counters live in the counters table.
+    assert _counters(analytics) == {(1, PAGE_TOTAL): (1, 0)}
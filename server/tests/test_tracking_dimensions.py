@@ -0,0 +1,25 @@
+from sqlalchemy import create_engine, func, select
+
+from db import AnalyticsBase
+from models.tracking_dimension import UserAgent
+from services.tracking_dimensions import MAX_DIMENSION_LENGTH, DimensionCache
+
+
+def test_intern_reuses_ids_and_bounds_the_cache(tmp_path):
+    analytics = create_engine(f"sqlite:///{tmp_path}/analytics.db")
+    AnalyticsBase.metadata.create_all(analytics)
+    cache = DimensionCache(UserAgent, maxsize=2)
+
+    with analytics.begin() as conn:
+        ids = cache.intern_many(conn, ["a", "b", "c", None, "", "a"])
+        assert set(ids) == {"a", "b", "c"}
+        assert len(cache._ids) == 2
+        assert cache.intern(conn, None) is None
+
+    # A second cache (another worker) sees the same ids.
+    other = DimensionCache(UserAgent, maxsize=10)
+    with analytics.begin() as conn:
+        assert other.intern_many(conn, ["a", "b", "c"]) == ids
+        long = "x" * (MAX_DIMENSION_LENGTH + 10)
+        assert other.intern(conn, long) == other.intern(conn, long[:MAX_DIMENSION_LENGTH])
+        assert conn.execute(select(func.count()).select_from(UserAgent)).scalar() == 4
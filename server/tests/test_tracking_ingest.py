@@ -0,0 +1,171 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+import models  # noqa: F401  (registers every table)
+from db import AnalyticsBase, Base
+from models import Block, Page, PageView
+from services import tracking_ingest
+from services.tracking_ingest import TrackingQueue, TrackingTargetCache, tracking_event
+
+
+@pytest.fixture
+def engines(tmp_path):
+    main = create_engine(f"sqlite:///{tmp_path}/main.db")
+    analytics = create_engine(f"sqlite:///{tmp_path}/analytics.db")
+    Base.metadata.create_all(main)
+    AnalyticsBase.metadata.create_all(analytics)
+    with main.begin() as conn:
+        conn.execute(insert(Page), [{"id": 1, "slug": "one", "title": "One"}])
+        conn.execute(insert(Block), [{"id": 10, "page_id": 1, "label": "L", "url": "https://example.com"}])
+    return main, analytics
+
+
+def _queue(engines, **kwargs):
+    main, analytics = engines
+    options = {"maxsize": 100, "batch_size": 10, "interval": 60, "enqueue_timeout": 0, "max_retries": 3}
+    return TrackingQueue(analytics, main, **{**options, **kwargs})
+
+
+def _views(analytics):
+    with analytics.connect() as conn:
+        return conn.execute(select(func.count()).select_from(PageView)).scalar()
+
+
+def test_submit_and_flush_write_each_event(engines):
+    queue = _queue(engines)
+    assert queue.submit([tracking_event(1), tracking_event(1, 10)])
+    assert queue.submit([tracking_event(1), tracking_event(2)])  # page 2 does not exist
+    assert queue.submit([])
+
+    assert queue.flush() == 4
+    stats = queue.stats()
+    assert (stats["pending"], stats["written"], stats["discarded"]) == (0, 3, 1)
+    assert _views(engines[1]) == 2
+
+
+def test_full_queue_drops_whole_units(engines):
+    queue = _queue(engines, maxsize=3)
+    assert queue.submit([tracking_event(1)] * 2)
+    assert not queue.submit([tracking_event(1)] * 2)
+
+    stats = queue.stats()
+    assert (stats["pending"], stats["dropped"], stats["waits"]) == (2, 2, 1)
+
+
+def test_busy_queue_answers_503(client, page, monkeypatch):
+    _, slug = page
+    monkeypatch.setattr(tracking_ingest.tracking_queue, "submit", lambda events: False)
+
+    r = client.post("/content/public/track/view", json={"slug": slug}, headers={"User-Agent": uuid.uuid4().hex})
+
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_stop_drains_the_queue(engines):
+    queue = _queue(engines)
+    queue.start()
+    queue.submit([tracking_event(1)] * 3)
+
+    queue.stop()
+
+    assert queue.pending() == 0
+    assert _views(engines[1]) == 3
+
+
+def test_failed_batch_is_retried(engines, monkeypatch):
+    queue = _queue(engines)
+    write = queue._write
+    calls = []
+
+    def flaky(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        write(batch)
+
+    monkeypatch.setattr(queue, "_write", flaky)
+    queue.submit([tracking_event(1)] * 2)
+
+    with pytest.raises(RuntimeError):
+        queue.flush()
+    assert queue.pending() == 2
+
+    assert queue.flush() == 2
+    assert calls == [2, 2]
+    assert _views(engines[1]) == 2
+
+
+def test_batch_failing_every_retry_is_dropped(engines, monkeypatch):
+    queue = _queue(engines, batch_size=2, max_retries=3)
+
+    def write(batch):
+        if any(e["page_id"] == 666 for e in batch):
+            raise ValueError("bad event")
+        TrackingQueue._write(queue, batch)
+
+    monkeypatch.setattr(queue, "_write", write)
+    queue.submit([tracking_event(666), tracking_event(1)])
+    queue.submit([tracking_event(1)])
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            queue.flush()
+    # The third failure drops the bad batch and the rest still goes out.
+    assert queue.flush() == 1
+
+    stats = queue.stats()
+    assert (stats["pending"], stats["failed"], stats["written"]) == (0, 2, 1)
+
+
+def test_target_cache_rechecks_misses(engines):
+    main, _ = engines
+    cache = TrackingTargetCache(maxsize=100, ttl=60, recheck=0)
+
+    with Session(main) as db:
+        assert cache.resolve(db, "two") is None
+        db.add(Page(id=2, slug="two", title="Two"))
+        db.add(Block(id=20, page_id=2, label="L", url="https://example.com"))
+        db.commit()
+
+        # Cached as unknown until a miss asks for a recheck
+        assert cache.resolve(db, "two") is None
+        assert cache.resolve(db, "two", recheck=True).block_ids == {20}
+
+        db.add(Block(id=21, page_id=2, label="M", url="https://example.com"))
+        db.commit()
+        assert 21 not in cache.resolve(db, "two").block_ids
+        assert cache.resolve_many(db, ["two"], recheck={"two"})["two"].block_ids == {20, 21}
+
+
+def test_target_cache_limits_rechecks(engines):
+    main, _ = engines
+    cache = TrackingTargetCache(maxsize=100, ttl=60, recheck=60)
+
+    with Session(main) as db:
+        assert cache.resolve(db, "three") is None
+        db.add(Page(id=3, slug="three", title="Three"))
+        db.commit()
+        assert cache.resolve(db, "three", recheck=True) is None
+
+
+def test_click_on_block_from_another_worker_is_accepted(client, page, db, tracked, monkeypatch):
+    _, slug = page
+    monkeypatch.setattr(tracking_ingest.tracking_targets, "recheck", 0)
+    client.post("/content/public/track/view", json={"slug": slug}, headers={"User-Agent": uuid.uuid4().hex})
+
+    # Written straight to the database, as another worker would, so this
+    # worker's cache is not invalidated.
+    page_id = db.query(Page.id).filter(Page.slug == slug).scalar()
+    block = Block(page_id=page_id, label="New", url="https://example.com/new")
+    db.add(block)
+    db.commit()
+
+    r = client.post("/content/public/track/click", json={"slug": slug, "block_id": block.id})
+    assert r.status_code == 202
+    r = client.post("/content/public/track/batch", json=[{"type": "click", "slug": slug, "block_id": block.id}])
+    assert r.json()["accepted"] == 1
+    assert [e["block_id"] for e in tracked] == [None, block.id, block.id]
@@ -0,0 +1,66 @@
+import random
+from collections import Counter
+
+from services import tracking_sampling
+from services.tracking_sampling import AdaptiveSampler
+
+
+def _events(rng, n, pages=(1, 2, 3), blocks=(None, 10, 11)):
+    return [{"page_id": rng.choice(pages), "block_id": rng.choice(blocks)} for _ in range(n)]
+
+
+def _totals(rows, weighted):
+    totals = Counter()
+    for row in rows:
+        totals[(row["page_id"], row["block_id"])] += row["sample_weight"] if weighted else 1
+    return totals
+
+
+def test_weights_sum_to_event_counts():
+    rng = random.Random(23)
+    for _ in range(200):
+        sampler = AdaptiveSampler(threshold=1, window=3600, max_factor=50)
+        sampler._factors = {page: rng.randint(1, 60) for page in (1, 2, 3) if rng.random() < 0.8}
+        rows = _events(rng, rng.randint(0, 300))
+        expected = _totals(rows, weighted=False)
+
+        kept = sampler.sample(rows)
+
+        assert _totals(kept, weighted=True) == expected
+        assert all(row["sample_weight"] >= 1 for row in kept)
+        assert sampler.sampled_out == sum(expected.values()) - len(kept)
+
+
+def test_unsampled_pages_keep_every_row():
+    sampler = AdaptiveSampler(threshold=1, window=3600, max_factor=50)
+    sampler._factors = {1: 10}
+    rows = [{"page_id": 2, "block_id": None} for _ in range(25)]
+    kept = sampler.sample(rows)
+    assert len(kept) == 25
+    assert {row["sample_weight"] for row in kept} == {1}
+
+
+def test_disabled_sampler_keeps_everything():
+    sampler = AdaptiveSampler(threshold=0, window=10, max_factor=50)
+    rows = _events(random.Random(1), 500)
+    assert sampler.sample(rows) == rows
+    assert {row["sample_weight"] for row in rows} == {1}
+
+
+def test_factor_follows_previous_window_rate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tracking_sampling.time, "monotonic", lambda: now[0])
+    sampler = AdaptiveSampler(threshold=10, window=10, max_factor=4)
+
+    # 1000 events in 10s is 100/s, ten times the threshold; capped at 4.
+    sampler.sample([{"page_id": 1, "block_id": None} for _ in range(1000)])
+    sampler.sample([{"page_id": 2, "block_id": None} for _ in range(50)])
+    now[0] += 10
+    kept = sampler.sample([{"page_id": 1, "block_id": None} for _ in range(8)])
+
+    assert sampler.stats()["sampled_pages"] == {1: 4}
+    assert [row["sample_weight"] for row in kept] == [4, 4]
+
+    now[0] += 10
+    kept = sampler.sample([{"page_id": 1, "block_id": None} for _ in range(8)])
+    assert len(kept) == 8
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from services.tracking_ingest import tracking_queue
+from services.tracking_timeseries import click_through_rate
+
+
+def test_click_through_rate_handles_empty_buckets():
+    views = np.array([0, 4, 10])
+    clicks = np.array([[0, 1, 5], [0, 2, 0]])
+
+    assert click_through_rate(clicks, views).tolist() == [[0.0, 0.25, 0.5], [0.0, 0.5, 0.0]]
+
+
+def test_daily_series_counts_views_and_clicks(client, page):
+    headers, slug = page
+    block_id = client.post("/content/me/blocks", json={"label": "B", "url": "https://example.com"}, headers=headers).json()["id"]
+    client.post("/content/public/track/view", json={"slug": slug})
+    client.post("/content/public/track/click", json={"slug": slug, "block_id": block_id})
+    tracking_queue.flush()
+
+    r = client.get("/api/me/analytics/timeseries", headers=headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert len(body["buckets"]) == 30
+    assert body["buckets"][-1] == datetime.now(timezone.utc).strftime("%Y-%m-%dT00:00:00Z")
+    assert sum(body["views"]) == 1 and body["views"][-1] == 1
+    assert body["clicks"][-1] == 1 and body["ctr"][-1] == 1.0
+    assert [b["block_id"] for b in body["blocks"]] == [block_id]
+
+
+def test_hourly_series_buckets_are_utc(client, page):
+    headers, slug = page
+    client.post("/content/public/track/view", json={"slug": slug})
+    tracking_queue.flush()
+
+    body = client.get("/api/me/analytics/timeseries?interval=hour", headers=headers).json()
+    assert len(body["buckets"]) == 48
+    assert all(b.endswith("Z") for b in body["buckets"])
+    hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    index = body["buckets"].index(hour.strftime("%Y-%m-%dT%H:00:00Z"))
+    # The flush may straddle an hour boundary
+    assert body["views"][index] + (body["views"][index - 1] if index else 0) == 1
+
+
+def test_range_is_validated(client, page):
+    headers, _ = page
+    today = datetime.now(timezone.utc).date()
+    r = client.get(f"/api/me/analytics/timeseries?start={today}&end={today - timedelta(days=1)}", headers=headers)
+    assert r.status_code == 400
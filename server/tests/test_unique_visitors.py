@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from db import AnalyticsBase
+from services.unique_visitors import HyperLogLog, record_unique_visitors, unique_visitor_series
+
+
+@pytest.mark.parametrize("n", [0, 1, 10, 1_000, 50_000])
+def test_estimate_is_within_error_bounds(n):
+    hll = HyperLogLog()
+    for i in range(n):
+        hll.add(f"visitor-{i}")
+    # 2.3% standard error; allow 4 sigma, and exact answers for tiny sets.
+    assert abs(hll.estimate() - n) <= max(1, 0.092 * n)
+
+
+def test_duplicates_do_not_count():
+    hll = HyperLogLog()
+    for _ in range(10):
+        for i in range(500):
+            hll.add(f"visitor-{i}")
+    assert abs(hll.estimate() - 500) <= 0.092 * 500
+
+
+def test_merge_is_a_union():
+    a, b, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for i in range(3000):
+        (a if i < 2000 else b).add(f"v{i}")
+        if 1000 <= i < 2000:
+            b.add(f"v{i}")
+        both.add(f"v{i}")
+
+    a.merge(b)
+    assert a.to_bytes() == both.to_bytes()
+
+
+def test_registers_round_trip_and_size_is_checked():
+    hll = HyperLogLog()
+    hll.add("x")
+    assert HyperLogLog(registers=hll.to_bytes()).to_bytes() == hll.to_bytes()
+    with pytest.raises(ValueError):
+        HyperLogLog(registers=bytes(16))
+    with pytest.raises(ValueError):
+        HyperLogLog().merge(HyperLogLog(precision=4))
+
+
+def test_stored_sketches_merge_across_days(tmp_path):
+    analytics = create_engine(f"sqlite:///{tmp_path}/analytics.db")
+    AnalyticsBase.metadata.create_all(analytics)
+    monday = date(2026, 3, 2)
+    events = [
+        {"page_id": 1, "created_at": datetime.combine(monday + timedelta(days=d), datetime.min.time()),
+         "ip_address": f"10.0.0.{v}", "user_agent": "ua"}
+        for d in range(3)
+        for v in range(20)
+    ]
+    with analytics.begin() as conn:
+        record_unique_visitors(conn, events[:30])
+    with analytics.begin() as conn:
+        record_unique_visitors(conn, events[30:])
+
+    with Session(analytics) as db:
+        daily, total = unique_visitor_series(db, 1, monday, monday + timedelta(days=2))
+        weekly, _ = unique_visitor_series(db, 1, monday, monday + timedelta(days=2), period="week")
+
+    assert [n for _, n in daily] == [20, 20, 20]
+    assert total == 20
+    assert weekly == [(monday, 20)]
@@ -0,0 +1,57 @@
+import pytest
+
+from services.view_dedup import ViewDeduplicator
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("services.view_dedup.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_repeat_inside_window_is_suppressed(clock):
+    dedup = ViewDeduplicator(window=30, max_keys=100)
+
+    assert dedup.should_record(1, "1.2.3.4", "ua")
+    clock[0] += 10
+    assert not dedup.should_record(1, "1.2.3.4", "ua")
+    # Different page, IP or user agent are different visitors.
+    assert dedup.should_record(2, "1.2.3.4", "ua")
+    assert dedup.should_record(1, "1.2.3.5", "ua")
+    assert dedup.should_record(1, "1.2.3.4", "other")
+    assert dedup.stats()["suppressed"] == 1
+
+
+def test_window_slides_with_every_view(clock):
+    dedup = ViewDeduplicator(window=30, max_keys=100)
+
+    assert dedup.should_record(1, "1.2.3.4", "ua")
+    for _ in range(5):
+        clock[0] += 20
+        assert not dedup.should_record(1, "1.2.3.4", "ua")
+
+    clock[0] += 31
+    assert dedup.should_record(1, "1.2.3.4", "ua")
+
+
+def test_views_without_ip_are_never_suppressed(clock):
+    dedup = ViewDeduplicator(window=30, max_keys=100)
+
+    assert dedup.should_record(1, None, "Mozilla/5.0")
+    assert dedup.should_record(1, None, "Mozilla/5.0")
+    assert dedup.stats()["keys"] == 0
+
+
+def test_key_count_is_bounded(clock):
+    dedup = ViewDeduplicator(window=30, max_keys=10)
+
+    for i in range(100):
+        dedup.should_record(1, f"10.0.0.{i}", "ua")
+    assert dedup.stats()["keys"] <= 10
+
+
+def test_disabled_window_records_everything(clock):
+    dedup = ViewDeduplicator(window=0, max_keys=10)
+    assert dedup.should_record(1, "1.2.3.4", "ua")
+    assert dedup.should_record(1, "1.2.3.4", "ua")
@@ -0,0 +1,48 @@
+import ipaddress
+import os
+from typing import Optional
+
+from fastapi import Request
+
+# Reverse proxies (IPs or CIDRs, comma separated) whose X-Forwarded-For /
+# X-Real-IP headers are believed, e.g. the nginx serving the static pages.
+# Set to "" when the app is exposed directly.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(value.strip(), strict=False)
+    for value in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",")
+    if value.strip()
+]
+
+
+def _is_trusted_proxy(ip: str) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    The visitor's IP address, or None if it cannot be told.
+
+    Behind a trusted proxy this is the right-most X-Forwarded-For entry that
+    is not a trusted proxy itself (entries further left are client-supplied
+    and can be forged), falling back to X-Real-IP.
+    """
+    peer = request.client.host if request.client else None
+    if not peer or not _is_trusted_proxy(peer):
+        return peer
+
+    forwarded = [
+        ip.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for ip in header.split(",")
+        if ip.strip()
+    ]
+    for ip in reversed(forwarded):
+        if not _is_trusted_proxy(ip):
+            return ip
+    if forwarded:
+        return forwarded[0]
+    return request.headers.get("x-real-ip", "").strip() or None
@@ -0,0 +1,57 @@
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Runs `fn` every `interval` seconds on a daemon thread.
+
+    `wake()` triggers an early run, and `stop()` runs `fn` one last time
+    after the thread has exited (unless `final_run` is False) so nothing
+    buffered is lost on shutdown.
+    """
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], None], final_run: bool = True):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.final_run = final_run
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.final_run:
+            self._run_once()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self._run_once()
+
+    def _run_once(self):
+        try:
+            self.fn()
+        except Exception:
+            logger.exception("Periodic task %s failed", self.name)
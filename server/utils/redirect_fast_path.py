@@ -0,0 +1,85 @@
+from urllib.parse import quote
+
+import anyio
+
+from db import SessionLocal
+from services.short_link_cache import CACHE_MISS, resolve_short_code, short_link_cache
+from services.short_link_clicks import click_aggregator
+
+_NOT_FOUND_BODY = b'{"detail":"Short link not found"}'
+
+
+def _lookup(short_code: str):
+    with SessionLocal() as db:
+        return resolve_short_code(db, short_code)
+
+
+class ShortLinkRedirectMiddleware:
+    """
+    Pure ASGI handler for GET and HEAD /r/{short_code}, mounted in front of
+    the FastAPI app. Only GETs are recorded as clicks.
+
+    Redirects need no auth or validation, so they skip routing, dependency
+    resolution and response models entirely. Cache hits are answered
+    without leaving the event loop; misses do one lookup in a worker
+    thread. Anything that is not a plain short-code GET falls through to
+    the regular app (and the /r/{short_code} route there).
+    """
+
+    def __init__(self, app, prefix: str = "/r/"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        short_code = scope["path"][len(self.prefix):]
+        if not short_code or "/" in short_code:
+            await self.app(scope, receive, send)
+            return
+
+        resolved = short_link_cache.get(short_code)
+        if resolved is CACHE_MISS:
+            resolved = await anyio.to_thread.run_sync(_lookup, short_code)
+
+        if not resolved:
+            await send({
+                "type": "http.response.start",
+                "status": 404,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_NOT_FOUND_BODY)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _NOT_FOUND_BODY})
+            return
+
+        link_id, original_url = resolved
+
+        # HEAD comes from link checkers and unfurlers, not visitors
+        if scope["method"] == "GET":
+            headers = dict(scope["headers"])
+            referrer = headers.get(b"referer") or headers.get(b"referrer")
+            user_agent = headers.get(b"user-agent")
+            click_aggregator.record(
+                link_id,
+                referrer=referrer.decode("latin-1") if referrer else None,
+                user_agent=user_agent.decode("latin-1") if user_agent else None,
+            )
+
+        location = quote(original_url, safe=":/%#?=@[]!$&'()*+,;")
+        await send({
+            "type": "http.response.start",
+            "status": 307,
+            "headers": [
+                (b"location", location.encode("latin-1")),
+                (b"content-length", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b""})
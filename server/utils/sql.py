@@ -0,0 +1,37 @@
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def _insert_for(conn, table: Table):
+    # Works for both Connections and ORM Sessions
+    dialect = conn.get_bind().dialect if hasattr(conn, "get_bind") else conn.dialect
+    if dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def upsert_increment(conn, table: Table, key_columns: list[str], rows: list[dict]):
+    """
+    Insert `rows`, or add their non-key values onto the existing row when the
+    key already exists (INSERT ... ON CONFLICT DO UPDATE SET c = c + excluded.c).
+    """
+    if not rows:
+        return
+
+    stmt = _insert_for(conn, table)
+    counters = [name for name in rows[0] if name not in key_columns]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={name: table.c[name] + stmt.excluded[name] for name in counters},
+    )
+    conn.execute(stmt, rows)
+
+
+
+def insert_ignore(conn, table: Table, rows: list[dict]):
+    """Insert `rows`, skipping any that collide with a unique constraint."""
+    if not rows:
+        return
+
+    stmt = _insert_for(conn, table).on_conflict_do_nothing()
+    conn.execute(stmt, rows)